@@ -1,33 +1,204 @@
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
+import json
+import math
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List, Optional
 from dotenv import load_dotenv
-import random
-import regex as re
+from intents import INTENT_CONFIG_FILE
+from intent_config import IntentConfigWatcher
+from llm_gate import LLMGate
+from rate_limit import RateLimited, RateLimiter
+from response_cache import MemoryTier, ResponseCache, SQLiteTier, cache_key
+from sessions import SessionStore, SQLiteSessionTier
+from prompt_builder import PromptBuilder
+from single_flight import SingleFlight
+from models import ModelRegistry, build_gemini
+from routing import ModelRouter, load_policy
+from resilience import CircuitOpenError, bounded_stream
+from canned import CannedStore, prompt_fingerprint, representative_age
+from shared_state import SharedCounters, SharedTokenBuckets
+from capture import CaptureLog, pseudonym
+from instrumentation import (
+    TimingMiddleware, collect_stages, intent_requests, observe_parse, observe_stage, render_metrics, setup_logging,
+    stage_timer,
+)
 
 # Load environment variables from .env file
 dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
 load_dotenv(dotenv_path)
 
-# Set up Google AI API key
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
+# Log through a queue so request handlers never block on stream I/O
+logger = setup_logging(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+# Google Gemini clients are built on first use (or at startup when pre-warmed), not at import,
+# so the intent logic and tooling can load without the SDK or a GEMINI_API_KEY
+DEFAULT_MODEL = "gemini-1.5-pro"
+FAST_MODEL = "gemini-1.5-flash"
+model_registry = ModelRegistry()
+for model_name in (DEFAULT_MODEL, FAST_MODEL):
+    model_registry.register(model_name, partial(
+        build_gemini,
+        model_name,
+        temperature=0.7,
+        max_tokens=480,
+        timeout=30,
+        max_retries=2,
+    ))
+
+# LLM_BACKEND=fake serves every model from fake_llm.FakeChatModel, for benchmarks and local multi-worker runs
+if os.getenv("LLM_BACKEND", "gemini") == "fake":
+    from fake_llm import FakeChatModel
+    fake_model = FakeChatModel(
+        first_token_latency=float(os.getenv("FAKE_LLM_LATENCY", "0.3")),
+        tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "400")),
+    )
+    for model_name in model_registry.names():
+        model_registry.set(model_name, fake_model)
+
+# Comma-separated models to build during startup; empty defers every client to its first request
+PREWARM_MODELS = [name for name in os.getenv("PREWARM_MODELS", f"{DEFAULT_MODEL},{FAST_MODEL}").split(",") if name]
+
+# Route cheap prompts to the fast model and personalised plans to pro; ROUTING_POLICY_FILE overrides the table
+model_router = ModelRouter(
+    model_registry,
+    load_policy(os.getenv("ROUTING_POLICY_FILE", "")),
+    hedging=os.getenv("LLM_HEDGING", "1") == "1",
+    breaker_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    breaker_cooldown=float(os.getenv("BREAKER_COOLDOWN", "30")),
+)
+
+# CAPTURE_FILE records every /send_message request with its stage timings, for replay.py.
+# Names and emails are hashed unless CAPTURE_REDACT=0; CAPTURE_SAMPLE_RATE keeps a fraction.
+CAPTURE_FILE = os.getenv("CAPTURE_FILE", "")
+capture_log = CaptureLog(
+    CAPTURE_FILE,
+    sample_rate=float(os.getenv("CAPTURE_SAMPLE_RATE", "1")),
+    redact_fields=os.getenv("CAPTURE_REDACT", "1") == "1",
+) if CAPTURE_FILE else None
+
+# Intent tables and their compiled matcher/classifier; the file is re-read when it changes.
+# INTENT_CONFIG_POLL_SECONDS=0 loads it once at startup only.
+INTENT_CONFIG_POLL_SECONDS = float(os.getenv("INTENT_CONFIG_POLL_SECONDS", "2"))
+intent_config = IntentConfigWatcher(INTENT_CONFIG_FILE, INTENT_CONFIG_POLL_SECONDS)
+
+# Keyword misses ("default"/"common") take the classifier's topic when it is at least this confident,
+# so the user skips the clarification round trip
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+
+# Default end-to-end budget for an LLM answer when the client sends no deadline_ms
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "40000"))
 
-if GOOGLE_API_KEY is None:
-    raise ValueError("GEMINI_API_KEY is not found. Please set it in the .env file.")
 
-os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY  # Ensure API key is available globally
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build clients off the event loop; a missing key still fails the server at startup
+    start = time.perf_counter()
+    await asyncio.to_thread(model_registry.warm, PREWARM_MODELS)
+    startup_timings["prewarm_seconds"] = round(time.perf_counter() - start, 4)
+    logger.info("Startup: %s", startup_timings)
+    watchers = []
+    if INTENT_CONFIG_POLL_SECONDS > 0:
+        watchers.append(asyncio.create_task(intent_config.watch()))
+    if canned_store is not None and CANNED_POLL_SECONDS > 0:
+        watchers.append(asyncio.create_task(canned_store.watch()))
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+
 
 # Instantiate FastAPI app
-app = FastAPI(title="AI Translation API", version="1.0")
-
-# Instantiate Google Gemini Model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-pro",
-    temperature=0.7,
-    max_tokens=480,
-    timeout=30,
-    max_retries=2,
+app = FastAPI(title="AI Translation API", version="1.0", lifespan=lifespan)
+app.add_middleware(TimingMiddleware)
+
+
+# Identical prompts already in flight share one upstream call
+single_flight = SingleFlight()
+
+# Multi-worker mode: point every worker at one directory and they share the on-disk cache tier,
+# sessions and counters through SQLite files in WAL mode. The explicit *_DB settings still win.
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+if SHARED_STATE_DIR:
+    os.makedirs(SHARED_STATE_DIR, exist_ok=True)
+
+
+def shared_path(filename: str):
+    return os.path.join(SHARED_STATE_DIR, filename) if SHARED_STATE_DIR else ""
+
+
+shared_counters = SharedCounters(shared_path("counters.db")) if SHARED_STATE_DIR else None
+
+# Limit concurrent Gemini calls; extra requests wait on the event loop instead of blocking it.
+# Waiters are admitted fairly per tenant (see tenant_of); TENANT_WEIGHTS is a JSON object of tenant -> weight.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+llm_gate = LLMGate(LLM_MAX_IN_FLIGHT, weights=json.loads(os.getenv("TENANT_WEIGHTS", "{}")))
+
+# Per-tenant token bucket on messages that need a model answer; RATE_LIMIT_BURST=0 turns it off.
+# In multi-worker mode the buckets are shared, so the limit holds across workers.
+rate_limiter = RateLimiter(
+    burst=float(os.getenv("RATE_LIMIT_BURST", "20")),
+    refill_per_second=float(os.getenv("RATE_LIMIT_REFILL_PER_SECOND", "0.5")),
+    buckets=SharedTokenBuckets(shared_path("rate_limits.db")) if SHARED_STATE_DIR else None,
+)
+
+# Cache LLM answers by prompt; set RESPONSE_CACHE_DB to also keep them on disk across restarts
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", shared_path("responses.db"))
+
+cache_tiers = [MemoryTier(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)]
+if RESPONSE_CACHE_DB:
+    cache_tiers.append(SQLiteTier(RESPONSE_CACHE_DB, RESPONSE_CACHE_TTL))
+response_cache = ResponseCache(cache_tiers)
+
+# Answers for the templated "Yes" follow-ups, generated offline by precompute_canned.py
+CANNED_ANSWERS_DB = os.getenv("CANNED_ANSWERS_DB", "")
+# Re-run precompute_canned.py against the live file: workers pick up its commits within
+# CANNED_POLL_SECONDS (0 turns polling off; POST /admin/canned/reload still works)
+CANNED_POLL_SECONDS = float(os.getenv("CANNED_POLL_SECONDS", "5"))
+canned_store = CannedStore(CANNED_ANSWERS_DB, CANNED_POLL_SECONDS) if CANNED_ANSWERS_DB else None
+
+# Server-side conversation history; set SESSION_DB to persist turns on disk
+SESSION_DB = os.getenv("SESSION_DB", shared_path("sessions.db"))
+session_store = SessionStore(
+    max_turns=int(os.getenv("SESSION_MAX_TURNS", "50")),
+    idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "10000")),
+    persist=SQLiteSessionTier(SESSION_DB) if SESSION_DB else None,
+    shared=bool(SHARED_STATE_DIR),
+)
+
+
+async def summarize_history(summary: str, lines, tenant: str):
+    # Charged to the session's user like any model call: their rate limit, their share of
+    # llm_gate, and the router's breakers, fallback and timeout on the "summary" route
+    messages = [
+        ("system", "Summarize the user's earlier questions in two or three short sentences. Keep their goals, constraints and preferences."),
+        ("human", (f"Existing summary: {summary}\n" if summary else "") + "\n".join(lines)),
+    ]
+    route = model_router.choose("summary", "", 0)
+    if not model_router.available(route):
+        raise CircuitOpenError(route["model"])
+    await off_loop(rate_limiter, rate_limiter.acquire, tenant)
+    deadline = time.monotonic() + REQUEST_DEADLINE_MS / 1000
+    # A stage collection of its own, so this time is not added to the request that triggered it
+    with collect_stages():
+        return await invoke_llm(messages, route, deadline, tenant)
+
+
+# Trim history to a token budget; long sessions get their older turns folded into a cached summary
+prompt_builder = PromptBuilder(
+    token_budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "1024")),
+    summarize_after=int(os.getenv("SUMMARIZE_AFTER_TURNS", "12")),
+    keep_recent=int(os.getenv("SUMMARY_KEEP_RECENT", "6")),
+    summarizer=summarize_history,
 )
 
 # Define request model
@@ -37,124 +208,439 @@ class QueryRequest(BaseModel):
     email: str
     age: int
     gender: str
-    query_history: str
-
-intent_responses = {
-    "greeting": ["Hello! How can I help you?", "Hi there! What do you need assistance with?"],
-    "goodbye": ["Goodbye! Have a great day!", "See you soon! Take care."],
-    "workout_plan": ["I can suggest a workout plan. What’s your fitness goal?"],
-    "nutrition_advice": ["Healthy eating is essential! Do you have any dietary preferences?"],
-    "skincare": ["Skincare routine is essential! Do you want to build a skincare routine?"],
-    "common": ["Could you clarify? Are you asking about skincare, exercise, or nutrition?"],
-    "default": ["I’m not sure I understand. Can you rephrase?", "I am trained to only answer questions on fitness, nutrition, and skincare."]
-}
-
-intent_keywords = {
-    "greeting": ["hello", "hi", "hey", "greetings", "good morning", "good afternoon", "good evening", "what's up"],
-    "goodbye": ["bye", "goodbye", "see you", "farewell", "later", "adios", "ciao", "catch you later", "peace out"],
-    "workout_plan": [
-        "exercise", "gym", "bodybuilding", "weights", "lifting", "calisthenics", "yoga",
-        "pilates", "crossfit", "HIIT", "running", "jogging", "workout", "cardio",
-        "strength training", "resistance", "training session", "sweat", "endurance",
-        "sprints", "plyometrics", "interval training", "circuit training", "aerobics", 
-        "powerlifting", "bodyweight exercises", "stretching", "warm-up", "cool-down",
-        "mobility", "functional training", "endurance workout", "dynamic stretching", "stability training"
-    ],
-    "nutrition_advice": [
-        "diet", "calories", "macros", "meal plan", "vegan", "keto", "paleo", "nutrition",
-        "food", "healthy eating", "balanced diet", "meal prep", "snacks", "nutritious",
-        "calorie counting", "whole foods", "micronutrients", "meal timing", "intermittent fasting", "portion control",
-        "fiber-rich", "lean proteins", "complex carbs", "omega-3", "antioxidants",
-        "nutrient-dense", "plant-based", "gut health", "food groups", "vitamin-rich"
-    ],
-    "skincare": [
-        "skincare", "moisturizer", "sunscreen", "acne", "pimples", "serum", "cleanser",
-        "toner", "exfoliation", "anti-aging", "blemishes", "blackheads", "pores", "dark spots",
-        "skin", "face wash", "mask", "hydration", "spf", "sunblock", "beauty routine", "dermatologist",
-        "exfoliator", "retinol", "peptides", "anti-inflammatory", "oil-free",
-        "non-comedogenic", "hydrating", "antioxidant-rich", "blemish control", "pore minimizing",
-        "serum application", "hydration boost", "face moisturizer", "facial cleanser", "skin barrier"
-    ],
-    "common": [
-        "fitness", "training", "healthy", "hydration", "weight loss", "metabolism", "protein",
-        "carbs", "fat", "minerals", "vitamins", "fiber", "superfoods", "strength", "stamina",
-        "health", "wellness", "lifestyle", "balance", "self care", "routine", "prevention",
-        "vitality", "energy", "mindfulness", "exercise recovery", "active lifestyle", 
-        "stress management", "sleep quality", "self-improvement", "routine building", "balance training",
-        "daily habits", "lifestyle change", "fitness journey", "workout recovery", "health optimization"
-    ]
-}
-
+    query_history: str = ""
+    session_id: Optional[str] = None  # When set, history comes from the server-side session store
+    no_cache: bool = False  # Skip the response cache for this request
+    deadline_ms: Optional[int] = None  # Client's time budget for the answer; REQUEST_DEADLINE_MS when unset
 
 
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to FitAura Bot!"}
 
-# Intent recognition function
-def recognize_intent(user_input: str):
-    user_input = user_input.lower()  # Lowercase for consistency
-    
-    # First, check priority intents
-    priority_intents = ["workout_plan", "nutrition_advice", "skincare"]
-    for intent in priority_intents:
-        for keyword in intent_keywords[intent]:
-            pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-            if re.search(pattern, user_input):
-                return intent
-    
-    # Then check fallback intents (common, greeting, goodbye)
-    fallback_intents = ["common", "greeting", "goodbye"]
-    for intent in fallback_intents:
-        for keyword in intent_keywords[intent]:
-            pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-            if re.search(pattern, user_input):
-                return intent  # Return "common" if any fallback matches
-
-    return "default"
+def component_stats():
+    # Blocking in multi-worker mode (row counts and counter totals come from SQLite), so
+    # the endpoints build it on a worker thread
+    return {
+        "llm_gate": llm_gate.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "response_cache": response_cache.stats(),
+        "sessions": session_store.stats(),
+        "prompt": prompt_builder.stats(),
+        "single_flight": single_flight.stats(),
+        "models": model_registry.stats(),
+        "routes": model_router.stats(),
+        "intent_config": intent_config.stats(),
+        "intent_classifier": intent_config.current.classifier.stats(),
+        "startup": startup_timings,
+        "canned": canned_store.stats() if canned_store else {},
+        "capture": capture_log.stats() if capture_log else {},
+        "worker": {"pid": os.getpid(), "shared_state_dir": SHARED_STATE_DIR},
+        "cluster": shared_counters.snapshot() if shared_counters else {},
+    }
+
+@app.get("/stats")
+async def read_stats():
+    return await asyncio.to_thread(component_stats)
+
+# Prometheus text exposition of stage histograms, intent counters and component gauges
+@app.get("/metrics")
+async def read_metrics():
+    # Tenants are emails; label them by hash so scraped metrics carry no personal data
+    tenant_stats = {pseudonym(tenant): stats for tenant, stats in llm_gate.tenant_stats().items()}
+    stats = await asyncio.to_thread(component_stats)
+    return PlainTextResponse(render_metrics(stats, tenant_stats), media_type="text/plain; version=0.0.4")
+
+def tenant_of(request: QueryRequest):
+    # Email identifies the user across sessions, so opening new sessions does not reset the limit
+    return request.email.strip().lower() or request.session_id or "anonymous"
+
+async def off_loop(component, func, *args):
+    # Components backed by SQLite block on disk and on other workers' write locks, so they run on a worker thread
+    if component.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+async def check_rate_limit(request: QueryRequest, intent: str):
+    if intent in DIRECT_INTENTS:
+        return
+    try:
+        await off_loop(rate_limiter, rate_limiter.acquire, tenant_of(request))
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+def count_intent(intent: str):
+    intent_requests.inc(intent=intent)
+    if shared_counters:
+        # Totals across every worker, reported under "cluster" in /stats
+        shared_counters.add(f"intent_{intent}")
+
+# Active intent snapshot: version, content digest, compile time and reload errors
+@app.get("/admin/intents")
+async def read_intent_config():
+    return intent_config.stats()
+
+# Re-read the intent config now instead of waiting for the next poll
+@app.post("/admin/intents/reload")
+async def reload_intent_config():
+    reloaded = await asyncio.to_thread(intent_config.reload)
+    return {"reloaded": reloaded, **intent_config.stats()}
+
+# Re-read the canned-answer table now instead of waiting for the next poll
+@app.post("/admin/canned/reload")
+async def reload_canned_answers():
+    if canned_store is None:
+        raise HTTPException(status_code=404, detail="CANNED_ANSWERS_DB is not set")
+    await asyncio.to_thread(canned_store.reload)
+    return canned_store.stats()
+
+@app.post("/sessions")
+async def create_session():
+    return {"session_id": session_store.create()}
+
+async def resolve_history(request: QueryRequest):
+    # Sessions replace the client-built query_history: read prior turns, then record this one
+    if request.session_id:
+        session = await off_loop(session_store, session_store.get, request.session_id)
+        turns, summary = session.snapshot()
+        lines = [f"User: {query}" for _, query in turns]
+        await off_loop(session_store, session_store.append, request.session_id, request.query)
+        return lines, summary
+    return request.query_history.splitlines(), ""
+
+
+def schedule_summary(request: QueryRequest):
+    # Only after a model answer, so greetings, rejected and degraded requests never start a summary call
+    session = session_store.cached(request.session_id) if request.session_id else None
+    if session is not None:
+        prompt_builder.maybe_summarize(session, tenant_of(request))
+
+
+# Intents answered straight from the configured intent_responses without calling the model
+DIRECT_INTENTS = ["greeting", "goodbye", "default", "common"]
+
+
+def direct_response(request: QueryRequest, intent: str, snapshot):
+    response = snapshot.reply(intent)
+    if intent == "common":
+        return {"query": request.query, "intent_response": "common", "response": response}
+    return {"query": request.query, "intent_response": "", "response": response}
+
+
+def build_system_message(request: QueryRequest, intent: str):
+    if intent == "workout_plan":
+        return f"You are a certified fitness coach. Can you create a personalized workout plan for a {request.gender} who is {request.age} years old?"
+    elif intent == "nutrition_advice":
+        return f"You are a nutrition expert. Provide dietary recommendations for a {request.gender} who is {request.age} years old."
+    elif intent == "skincare":
+        return f"You are a dermatologist. Give skincare recommendations for a {request.gender} who is {request.age} years old."
+    return f"You are an expert. Can you help a {request.gender} who is {request.age} years old?"
+
+
+def build_messages(request: QueryRequest, intent: str, history):
+    system_message = build_system_message(request, intent)
+    history_lines, summary = history
+
+    with stage_timer("prompt_build"):
+        messages, prompt_info = prompt_builder.build(system_message, request.query, history_lines, summary)
+    logger.debug("Prompt: %s", prompt_info)
+    return messages
+
+
+def canned_prompt(request: QueryRequest, intent: str):
+    # The prompt a canned answer is generated from: the bucket's midpoint age and no history
+    bucket_request = request.model_copy(update={"age": representative_age(request.age)})
+    return [
+        ("system", build_system_message(bucket_request, intent)),
+        ("human", "Current Question: " + request.query),
+    ]
+
+
+async def lookup_cached(request: QueryRequest, intent: str, messages):
+    if request.no_cache:
+        return None
+    if canned_store is not None:
+        cached = canned_store.get(
+            request.query, request.gender, request.age, lambda: prompt_fingerprint(canned_prompt(request, intent))
+        )
+        if cached is not None:
+            return cached
+    return await off_loop(response_cache, response_cache.get, messages)
+
+
+async def store_answer(request: QueryRequest, messages, answer: str):
+    if request.no_cache:
+        return
+    await off_loop(response_cache, response_cache.set, messages, answer)
+
+
+async def generate_answer(request: QueryRequest, intent: str, messages, route, deadline: float):
+    cached = await lookup_cached(request, intent, messages)
+    if cached is not None:
+        return cached
+
+    # Fail fast instead of queuing behind llm_gate while every model on the route is tripped
+    if not model_router.available(route):
+        raise CircuitOpenError(route["model"])
+
+    answer = await asyncio.wait_for(
+        single_flight.run(cache_key(messages), lambda: invoke_llm(messages, route, deadline, tenant_of(request))),
+        timeout=max(0.0, deadline - time.monotonic()),
+    )
+
+    await store_answer(request, messages, answer)
+    return answer
+
+
+async def invoke_llm(messages, route, deadline: float, tenant: str):
+    async with llm_gate.slot(tenant) as wait:
+        observe_stage("llm_queue", wait)
+        with stage_timer("llm"):
+            response = await model_router.invoke(route, messages, deadline)
+    return response.content
+
+
+def request_deadline(request: QueryRequest):
+    return time.monotonic() + (request.deadline_ms or REQUEST_DEADLINE_MS) / 1000
+
+
+def degraded_response(request: QueryRequest, intent: str, snapshot):
+    # Canned intent reply used when the model is unavailable or the deadline passes
+    return {"query": request.query, "intent_response": "", "response": snapshot.reply(intent), "degraded": True}
+
+
+async def answer_query(request: QueryRequest, intent: str, history, snapshot):
+    # If intent is greeting, goodbye, or default, return a direct response
+    if intent in DIRECT_INTENTS:
+        return direct_response(request, intent, snapshot)
+
+    # Fetch a relevant intent response if available
+    intent_response = snapshot.reply(intent)
+    logger.debug("Intent Response: %s", intent_response)
+
+    # Invoke Gemini model
+    deadline = request_deadline(request)
+    messages = build_messages(request, intent, history)
+    route = model_router.choose(intent, request.query, len(history[0]))
+    logger.debug("Route: %s", route["name"])
+    try:
+        answer = await generate_answer(request, intent, messages, route, deadline)
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logger.warning("Serving canned %s reply: %r", intent, e)
+        return degraded_response(request, intent, snapshot)
+    schedule_summary(request)
+
+    # Return JSON response
+    return {"query": request.query, "intent_response": intent_response, "response": answer}
 
 
 # API Endpoint for sending message to AI model
 @app.post("/send_message")
 async def translate_text(request: QueryRequest):
-    try:
-        # Recognize intent
-        intent = recognize_intent(request.query)
-        print("Intent:", intent)
-
-        # If intent is greeting, goodbye, or default, return a direct response
-        if intent in ["greeting", "goodbye", "default", "common"]:
-            response  = random.choice(intent_responses[intent])
-            if intent == "common":
-                return {"query": request.query, "intent_response": "common", "response": response}
-            return {"query": request.query, "intent_response": "", "response": response}
-
-        # Define prompt based on intent
-        if intent == "workout_plan":
-            system_message = f"You are a certified fitness coach. Can you create a personalized workout plan for a {request.gender} who is {request.age} years old?"
-        elif intent == "nutrition_advice":
-            system_message = f"You are a nutrition expert. Provide dietary recommendations for a {request.gender} who is {request.age} years old."
-        elif intent == "skincare":
-            system_message = f"You are a dermatologist. Give skincare recommendations for a {request.gender} who is {request.age} years old."
-        else:
-            system_message = f"You are an expert. Can you help a {request.gender} who is {request.age} years old?"
-
-        # Fetch a relevant intent response if available
-        intent_response = random.choice(intent_responses[intent])
-        print("Intent Response:", intent_response)
-
-        query_response = "Current Question: "+ request.query + "\n"+"Previous Questions: " + request.query_history
-        print("Query:", query_response)
-
-        # Invoke Gemini model
-        messages = [
-            ("system", system_message),
-            ("human", query_response),
-        ]
-        response = llm.invoke(messages)
-
-        # Return JSON response
-        return {"query": request.query, "intent_response": intent_response, "response": response.content}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    with collect_stages() as stages:
+        observe_parse()
+        start = time.perf_counter()
+        intent = None
+        status = 500
+        try:
+            # Recognize intent
+            # One snapshot for the whole request, even if a reload swaps in a new one meanwhile
+            snapshot = intent_config.current
+            with stage_timer("intent"):
+                intent, confidence = snapshot.classify(request.query, INTENT_CONFIDENCE_THRESHOLD)
+            count_intent(intent)
+            logger.debug("Intent: %s (%.2f)", intent, confidence)
+            # Before the session is touched, so a rejected request does not become a turn
+            await check_rate_limit(request, intent)
+
+            with stage_timer("history"):
+                history = await resolve_history(request)
+
+            result = await answer_query(request, intent, history, snapshot)
+            result["intent_confidence"] = round(confidence, 3)
+            with stage_timer("serialize"):
+                response = JSONResponse(result)
+            status = 200
+            return response
+
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if capture_log:
+                capture_log.record(request.model_dump(), intent, status, time.perf_counter() - start, stages)
+
+
+# Classify many queries in one pass without generating answers
+@app.post("/intents:batch")
+async def classify_batch(batch: List[QueryRequest]):
+    observe_parse()
+    with stage_timer("intent"):
+        results = intent_config.current.classify_many([request.query for request in batch], INTENT_CONFIDENCE_THRESHOLD)
+    return {"intents": [intent for intent, _ in results], "confidences": [round(confidence, 3) for _, confidence in results]}
+
+
+# Answer many queries in one request. Canned intents are answered directly; the rest
+# fan out concurrently behind llm_gate. With ?stream=true each result is sent as an
+# NDJSON frame (tagged with its index) as soon as it completes; otherwise results come back in order.
+@app.post("/send_messages:batch")
+async def translate_batch(batch: List[QueryRequest], stream: bool = False):
+    observe_parse()
+    snapshot = intent_config.current
+    with stage_timer("intent"):
+        intents = [intent for intent, _ in snapshot.classify_many([request.query for request in batch], INTENT_CONFIDENCE_THRESHOLD)]
+    for intent in intents:
+        count_intent(intent)
+
+    # Admit in order before fanning out: rejected requests are not recorded as session turns,
+    # and a later request in the same session sees the earlier ones in its history
+    histories = {}
+    rejected = {}
+    for index, request in enumerate(batch):
+        try:
+            await check_rate_limit(request, intents[index])
+        except HTTPException as e:
+            rejected[index] = {"query": request.query, "error": e.detail, "status_code": e.status_code}
+            continue
+        histories[index] = await resolve_history(request)
+
+    async def answer_at(index: int):
+        request = batch[index]
+        if index in rejected:
+            return index, rejected[index]
+        try:
+            result = await answer_query(request, intents[index], histories[index], snapshot)
+        except HTTPException as e:
+            result = {"query": request.query, "error": e.detail, "status_code": e.status_code}
+        except Exception as e:
+            result = {"query": request.query, "error": str(e)}
+        return index, result
+
+    tasks = [answer_at(index) for index in range(len(batch))]
+
+    if not stream:
+        results = await asyncio.gather(*tasks)
+        return {"responses": [result for _, result in results]}
+
+    async def frames():
+        for finished in asyncio.as_completed(tasks):
+            index, result = await finished
+            yield ndjson_frame({"index": index, **result})
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+# Streaming variant of /send_message: newline-delimited JSON frames.
+# The first frame carries the intent fields, then one frame per generated chunk, then a "done" frame.
+@app.post("/send_message/stream")
+async def stream_text(request: QueryRequest):
+    observe_parse()
+    snapshot = intent_config.current
+    with stage_timer("intent"):
+        intent, confidence = snapshot.classify(request.query, INTENT_CONFIDENCE_THRESHOLD)
+    count_intent(intent)
+    logger.debug("Intent: %s (%.2f)", intent, confidence)
+
+    # Checked before the session is touched and before the response starts, while a 429 can still be sent
+    await check_rate_limit(request, intent)
+    history = await resolve_history(request)
+
+    if intent in DIRECT_INTENTS:
+        result = direct_response(request, intent, snapshot)
+
+        async def direct_frames():
+            yield ndjson_frame({
+                "type": "meta", "query": request.query, "intent_response": result["intent_response"],
+                "intent_confidence": round(confidence, 3),
+            })
+            yield ndjson_frame({"type": "token", "text": result["response"]})
+            yield ndjson_frame({"type": "done"})
+
+        return StreamingResponse(direct_frames(), media_type="application/x-ndjson")
+
+    intent_response = snapshot.reply(intent)
+    messages = build_messages(request, intent, history)
+    route = model_router.choose(intent, request.query, len(history[0]))
+    deadline = request_deadline(request)
+
+    async def llm_frames():
+        yield ndjson_frame({
+            "type": "meta", "query": request.query, "intent_response": intent_response,
+            "intent_confidence": round(confidence, 3),
+        })
+
+        cached = await lookup_cached(request, intent, messages)
+        if cached is not None:
+            yield ndjson_frame({"type": "token", "text": cached})
+            yield ndjson_frame({"type": "done"})
+            return
+
+        if not model_router.available(route):
+            yield ndjson_frame({"type": "token", "text": degraded_response(request, intent, snapshot)["response"]})
+            yield ndjson_frame({"type": "done", "degraded": True})
+            return
+
+        # Same bounds as /send_message: the queue wait and the stream share the request deadline,
+        # each model is also held to the route timeout, and the fallback takes over while nothing has been sent
+        parts = []
+        try:
+            async with llm_gate.slot(tenant_of(request), timeout=max(0.0, deadline - time.monotonic())) as wait:
+                observe_stage("llm_queue", wait)
+                candidates = model_router.stream_models(route)
+                if not candidates:
+                    raise CircuitOpenError(route["model"])
+                with stage_timer("llm_stream"):
+                    for attempt, (model_name, model) in enumerate(candidates):
+                        breaker = model_router.breaker(model_name)
+                        last = attempt == len(candidates) - 1
+                        # Claims the single half-open probe, as ModelRouter._attempt does; if another
+                        # request already holds it, move on to the fallback
+                        if not breaker.allow():
+                            if last:
+                                raise CircuitOpenError(model_name)
+                            continue
+                        timeout = min(route.get("timeout") or math.inf, max(0.0, deadline - time.monotonic()))
+                        try:
+                            async for chunk in bounded_stream(model.astream(messages), timeout):
+                                if chunk.content:
+                                    parts.append(chunk.content)
+                                    yield ndjson_frame({"type": "token", "text": chunk.content})
+                        except (asyncio.CancelledError, GeneratorExit):
+                            # The client went away; that says nothing about the model, so release a probe
+                            breaker.record_cancelled()
+                            raise
+                        except Exception:
+                            breaker.record_failure()
+                            if parts or last or time.monotonic() >= deadline:
+                                raise
+                            continue
+                        breaker.record_success()
+                        break
+        except (CircuitOpenError, asyncio.TimeoutError) as e:
+            if not parts:
+                logger.warning("Serving canned %s reply: %r", intent, e)
+                yield ndjson_frame({"type": "token", "text": degraded_response(request, intent, snapshot)["response"]})
+                yield ndjson_frame({"type": "done", "degraded": True})
+                return
+            yield ndjson_frame({"type": "error", "detail": "deadline exceeded"})
+            return
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield ndjson_frame({"type": "error", "detail": str(e)})
+            return
+
+        await store_answer(request, messages, "".join(parts))
+        schedule_summary(request)
+        yield ndjson_frame({"type": "done"})
+
+    return StreamingResponse(llm_frames(), media_type="application/x-ndjson")
+
+
+def ndjson_frame(payload: dict):
+    return json.dumps(payload) + "\n"
+
+
+# Cold-start cost of importing this module, reported under "startup" in /stats
+startup_timings = {"import_seconds": round(time.perf_counter() - IMPORT_STARTED, 4)}
@@ -0,0 +1,246 @@
+"""Offline benchmarks for the FitAura backend.
+
+Runs without network access or a Gemini key: the model is replaced with
+fake_llm.FakeChatModel and the FastAPI app is driven in-process over ASGI.
+
+    python benchmark.py intents --queries 20000
+    python benchmark.py load --levels 1 8 32 128 --requests 256 --latency 0.3
+    python benchmark.py startup --runs 5
+    python benchmark.py workers --workers 1 2 4 --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import regex as re
+
+from fake_llm import FakeChatModel
+from intent_config import load_snapshot
+from intents import INTENT_CONFIG_FILE, load_intent_tables
+
+_filler = [
+    "i", "want", "a", "the", "for", "my", "how", "do", "should", "what", "is", "good", "best",
+    "today", "help", "me", "with", "plan", "some", "ideas", "week", "about", "can", "you",
+]
+
+
+def synthetic_queries(intent_keywords, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    keywords = [keyword for words in intent_keywords.values() for keyword in words]
+    queries = []
+    for _ in range(count):
+        words = rng.choices(_filler, k=rng.randint(3, 14))
+        # Roughly a quarter of the queries contain no keyword at all (the "default" path)
+        for _ in range(rng.choice([0, 0, 1, 1, 2])):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        queries.append(" ".join(words))
+    return queries
+
+
+def legacy_recognize_intent(user_input: str, snapshot):
+    # The original per-keyword compile-and-search loop, kept as a baseline
+    intent_keywords = snapshot.keywords
+    user_input = user_input.lower()
+    for intent in snapshot.priority_intents + snapshot.fallback_intents:
+        for keyword in intent_keywords[intent]:
+            pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
+            if re.search(pattern, user_input):
+                return intent
+    return "default"
+
+
+def percentile(samples, pct: float):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def bench_intents(count: int, compare_legacy: bool):
+    snapshot = load_snapshot(INTENT_CONFIG_FILE)
+    queries = synthetic_queries(snapshot.keywords, count)
+    print(f"intent recognition over {count} synthetic queries")
+
+    implementations = [("matcher", snapshot.recognize), ("hybrid", lambda query: snapshot.classify(query, 0.8)[0])]
+    if compare_legacy:
+        implementations.append(("legacy", lambda query: legacy_recognize_intent(query, snapshot)))
+
+    results = {}
+    for name, recognize in implementations:
+        timings = []
+        intents = []
+        for query in queries:
+            start = time.perf_counter()
+            intents.append(recognize(query))
+            timings.append(time.perf_counter() - start)
+        results[name] = intents
+        total = sum(timings)
+        print(
+            f"  {name:8s} mean {1e6 * total / count:8.1f} us  p50 {1e6 * percentile(timings, 50):8.1f} us  "
+            f"p99 {1e6 * percentile(timings, 99):8.1f} us  {count / total:10.0f} queries/s"
+        )
+
+    if compare_legacy and results["matcher"] != results["legacy"]:
+        mismatches = sum(a != b for a, b in zip(results["matcher"], results["legacy"]))
+        print(f"  WARNING: matcher disagrees with the legacy loop on {mismatches} queries")
+
+
+async def _load_level(client, concurrency: int, total: int, queries, use_cache: bool):
+    latencies = []
+    pending = iter(range(total))
+
+    async def worker():
+        for index in pending:
+            body = {
+                "query": queries[index % len(queries)],
+                "name": "bench",
+                "email": f"bench{index % concurrency}@example.com",
+                "age": 20 + index % 50,
+                "gender": "Female" if index % 2 else "Male",
+                "query_history": "",
+                "no_cache": not use_cache,
+            }
+            start = time.perf_counter()
+            response = await client.post("/send_message", json=body)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+async def bench_load(levels, total: int, latency: float, tokens_per_second: float, use_cache: bool):
+    import httpx
+
+    import app as backend
+
+    fake = FakeChatModel(first_token_latency=latency, tokens_per_second=tokens_per_second)
+    for model_name in backend.model_registry.names():
+        backend.model_registry.set(model_name, fake)
+    # The few synthetic tenants would otherwise exhaust their token buckets
+    backend.rate_limiter.enabled = False
+
+    # Every query hits an LLM-bound intent and is unique, so neither caching nor coalescing hides the model
+    queries = [f"{query} workout {i}" for i, query in enumerate(synthetic_queries(backend.intent_config.current.keywords, total))]
+
+    print(f"/send_message load test: {total} requests per level, fake LLM {latency}s + {tokens_per_second} tok/s")
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in levels:
+            latencies, elapsed = await _load_level(client, concurrency, total, queries, use_cache)
+            print(
+                f"  concurrency {concurrency:4d}  p50 {1000 * percentile(latencies, 50):8.1f} ms  "
+                f"p95 {1000 * percentile(latencies, 95):8.1f} ms  p99 {1000 * percentile(latencies, 99):8.1f} ms  "
+                f"mean {1000 * statistics.mean(latencies):8.1f} ms  {total / elapsed:8.1f} req/s"
+            )
+    print(f"  fake LLM calls: {fake.calls}")
+
+
+async def _wait_until_up(client, process, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            (await client.get("/")).raise_for_status()
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+async def bench_workers(worker_counts, concurrency: int, total: int, latency: float, port: int):
+    # Real uvicorn processes sharing one SHARED_STATE_DIR, driven over HTTP from this process.
+    # The per-worker LLM gate is lifted and the fake model answers almost at once, so the
+    # numbers show CPU and shared-state overhead rather than N workers x LLM_MAX_IN_FLIGHT.
+    import httpx
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    intent_keywords = load_intent_tables(INTENT_CONFIG_FILE)["intent_keywords"]
+    queries = [f"{query} workout {i}" for i, query in enumerate(synthetic_queries(intent_keywords, total))]
+    print(f"/send_message over HTTP: {total} requests at concurrency {concurrency}, fake LLM {latency}s, {os.cpu_count()} CPUs")
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as shared_dir:
+            env = dict(
+                os.environ, LLM_BACKEND="fake", FAKE_LLM_LATENCY=str(latency), PREWARM_MODELS="",
+                FAKE_LLM_TOKENS_PER_SECOND="1000000", LLM_MAX_IN_FLIGHT="100000",
+                SHARED_STATE_DIR=shared_dir, LOG_LEVEL="WARNING", RATE_LIMIT_BURST="0",
+            )
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+                cwd=backend_dir, env=env,
+            )
+            try:
+                limits = httpx.Limits(max_connections=concurrency)
+                async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+                    await _wait_until_up(client, process)
+                    latencies, elapsed = await _load_level(client, concurrency, total, queries, use_cache=False)
+            finally:
+                process.terminate()
+                process.wait()
+        print(
+            f"  workers {workers:3d}  p50 {1000 * percentile(latencies, 50):8.1f} ms  "
+            f"p95 {1000 * percentile(latencies, 95):8.1f} ms  {total / elapsed:8.1f} req/s"
+        )
+
+
+def bench_startup(runs: int):
+    # Fresh interpreters, so nothing is already cached in sys.modules
+    print(f"cold import of app.py over {runs} runs (no GEMINI_API_KEY, no model built)")
+    env = {key: value for key, value in os.environ.items() if key not in ("GEMINI_API_KEY", "GOOGLE_API_KEY")}
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import app"], cwd=backend_dir, env=env, check=True)
+        timings.append(time.perf_counter() - start)
+    print(f"  process + import  p50 {1000 * percentile(timings, 50):8.1f} ms  max {1000 * max(timings):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the FitAura backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    intents_parser = commands.add_parser("intents", help="microbenchmark keyword and hybrid intent recognition")
+    intents_parser.add_argument("--queries", type=int, default=20000)
+    intents_parser.add_argument("--no-legacy", action="store_true", help="skip the legacy per-keyword baseline")
+
+    load_parser = commands.add_parser("load", help="load-test /send_message against the fake LLM")
+    load_parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    load_parser.add_argument("--requests", type=int, default=256)
+    load_parser.add_argument("--latency", type=float, default=0.3, help="fake first-token latency in seconds")
+    load_parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    load_parser.add_argument("--cache", action="store_true", help="leave the response caches enabled")
+
+    startup_parser = commands.add_parser("startup", help="measure cold-start import time of app.py")
+    startup_parser.add_argument("--runs", type=int, default=5)
+
+    workers_parser = commands.add_parser("workers", help="throughput of uvicorn --workers N with shared state")
+    workers_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    workers_parser.add_argument("--concurrency", type=int, default=64)
+    workers_parser.add_argument("--requests", type=int, default=2000)
+    workers_parser.add_argument("--latency", type=float, default=0.0, help="fake first-token latency in seconds")
+    workers_parser.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+    if args.command == "intents":
+        bench_intents(args.queries, compare_legacy=not args.no_legacy)
+    elif args.command == "startup":
+        bench_startup(args.runs)
+    elif args.command == "workers":
+        asyncio.run(bench_workers(args.workers, args.concurrency, args.requests, args.latency, args.port))
+    else:
+        asyncio.run(bench_load(args.levels, args.requests, args.latency, args.tokens_per_second, args.cache))
+
+
+if __name__ == "__main__":
+    main()
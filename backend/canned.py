@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+from shared_state import connect_sqlite
+
+GENDERS = ["Male", "Female", "Other"]
+AGE_BUCKET_YEARS = 10
+MAX_AGE = 120
+
+# Intents whose intent_response the frontend turns into a "Yes" follow-up
+FOLLOW_UP_INTENTS = ["workout_plan", "nutrition_advice", "skincare"]
+
+
+def follow_up_queries(responses):
+    # responses: the intent_responses table of an IntentSnapshot.
+    # Must match the query frontend/app.py sends when the user clicks "Yes"
+    return [
+        f"My question: {intent_response} User responded Yes. So provide information."
+        for intent in FOLLOW_UP_INTENTS
+        for intent_response in responses[intent]
+    ]
+
+
+def age_bucket(age: int):
+    return min(max(age, 1), MAX_AGE) // AGE_BUCKET_YEARS
+
+
+def representative_age(age: int):
+    # Canned answers for a bucket are generated for its midpoint age
+    return min(age_bucket(age) * AGE_BUCKET_YEARS + AGE_BUCKET_YEARS // 2, MAX_AGE)
+
+
+def age_buckets():
+    return range(age_bucket(1), age_bucket(MAX_AGE) + 1)
+
+
+def prompt_fingerprint(messages):
+    # Entries generated from an older prompt wording no longer match and are treated as stale
+    return hashlib.sha256(repr(messages).encode("utf-8")).hexdigest()[:16]
+
+
+class CannedStore:
+    """Precomputed answers for templated follow-ups, keyed by (query, gender, age bucket).
+
+    Rows live in SQLite; the whole table is small and is loaded into a dict so lookups
+    never touch the disk on the request path. watch() polls SQLite's data_version, which
+    changes when another connection (such as precompute_canned.py) commits, and reloads
+    the dict then.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 5.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS canned ("
+            "query TEXT NOT NULL, gender TEXT NOT NULL, age_bucket INTEGER NOT NULL, "
+            "fingerprint TEXT NOT NULL, answer TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (query, gender, age_bucket))"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.reloads = 0
+        self._data_version = None
+        self.reload()
+
+    def reload(self):
+        with self._lock:
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            rows = self._conn.execute("SELECT query, gender, age_bucket, fingerprint, answer FROM canned").fetchall()
+        # Swapped in with one assignment, so concurrent lookups see the old or the new table
+        self._entries = {(query, gender, bucket): (fingerprint, answer) for query, gender, bucket, fingerprint, answer in rows}
+        self.reloads += 1
+
+    def refresh(self):
+        # Reload only if another connection has committed since the last load; returns True if it did
+        with self._lock:
+            changed = self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version
+        if changed:
+            self.reload()
+        return changed
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await asyncio.to_thread(self.refresh)
+
+    def get(self, query: str, gender: str, age: int, fingerprint):
+        # fingerprint is a callable so the prompt is only rebuilt when a row exists
+        entry = self._entries.get((query, gender, age_bucket(age)))
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != fingerprint():
+            self.stale += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def fingerprint_of(self, query: str, gender: str, bucket: int):
+        entry = self._entries.get((query, gender, bucket))
+        return entry[0] if entry else None
+
+    def put(self, query: str, gender: str, bucket: int, fingerprint: str, answer: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO canned (query, gender, age_bucket, fingerprint, answer, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (query, gender, bucket, fingerprint, answer, time.time()),
+            )
+            self._conn.commit()
+        self._entries[(query, gender, bucket)] = (fingerprint, answer)
+
+    def invalidate(self, query_contains: str = ""):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM canned WHERE instr(query, ?) > 0", (query_contains,))
+            self._conn.commit()
+        self.reload()
+        return cursor.rowcount
+
+    def stats(self):
+        return {
+            "entries": len(self._entries), "hits": self.hits, "misses": self.misses, "stale": self.stale, "reloads": self.reloads,
+        }
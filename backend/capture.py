@@ -0,0 +1,83 @@
+import atexit
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+
+# Request fields replaced by a short hash when redacting, so tenants stay distinguishable
+REDACTED_FIELDS = ["name", "email"]
+
+
+def pseudonym(value: str):
+    # Stable short hash: the same user always maps to the same label, but the label does not reveal who
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
+
+
+def redact(body: dict):
+    redacted = dict(body)
+    for field in REDACTED_FIELDS:
+        if redacted.get(field):
+            redacted[field] = pseudonym(redacted[field])
+    return redacted
+
+
+def read_capture(path: str):
+    with open(path, encoding="utf-8") as capture_file:
+        return [json.loads(line) for line in capture_file if line.strip()]
+
+
+class CaptureLog:
+    """Append-only NDJSON log of handled requests and their stage timings, for replay.py.
+
+    record() only enqueues; a background thread does the file I/O, so capturing adds no
+    disk latency to the request.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0, redact_fields: bool = True):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.redact_fields = redact_fields
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=10000)
+        self._writer = threading.Thread(target=self._write_loop, name="capture-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, body: dict, intent, status: int, handler_seconds: float, stages: dict):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        entry = {
+            "t": round(time.time(), 6),
+            "request": redact(body) if self.redact_fields else body,
+            "intent": intent,
+            "status": status,
+            "handler_ms": round(1000 * handler_seconds, 3),
+            "stages_ms": {stage: round(1000 * seconds, 3) for stage, seconds in stages.items()},
+        }
+        try:
+            self._queue.put_nowait(entry)
+            self.recorded += 1
+        except queue.Full:
+            # Never hold up a request for the capture; the replay just sees a gap
+            self.dropped += 1
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as capture_file:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                capture_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    capture_file.flush()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def stats(self):
+        return {"recorded": self.recorded, "dropped": self.dropped, "backlog": self._queue.qsize()}
@@ -0,0 +1,51 @@
+import asyncio
+import hashlib
+import time
+
+_vocabulary = [
+    "squats", "lunges", "protein", "hydrate", "stretch", "sleep", "vegetables", "sunscreen",
+    "rest", "cardio", "moisturize", "fiber", "routine", "recovery", "balance", "progress",
+]
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChatModel:
+    """Deterministic local stand-in for ChatGoogleGenerativeAI.
+
+    Answers are derived from a hash of the messages, so the same prompt always yields
+    the same text. Latency is first_token_latency plus output_tokens / tokens_per_second.
+    """
+
+    def __init__(self, first_token_latency: float = 0.3, tokens_per_second: float = 50.0, output_tokens: int = 120):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.calls = 0
+
+    def _tokens(self, messages):
+        digest = hashlib.sha256(repr(messages).encode("utf-8")).digest()
+        return [_vocabulary[digest[i % len(digest)] % len(_vocabulary)] + " " for i in range(self.output_tokens)]
+
+    def _total_latency(self):
+        return self.first_token_latency + self.output_tokens / self.tokens_per_second
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self._total_latency())
+        return FakeMessage("".join(self._tokens(messages)))
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._total_latency())
+        return FakeMessage("".join(self._tokens(messages)))
+
+    async def astream(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield FakeMessage(token)
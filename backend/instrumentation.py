@@ -0,0 +1,185 @@
+import atexit
+import bisect
+import logging
+import queue
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+_request_start = ContextVar("request_start", default=None)
+_request_stages = ContextVar("request_stages", default=None)
+
+
+def setup_logging(name: str = "fitaura", level: int = logging.INFO):
+    # Handlers only enqueue records; a background thread does the actual stream I/O
+    logger = logging.getLogger(name)
+    if any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        return logger
+
+    records = queue.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(records, stream)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = list(buckets)
+        self._series = {}  # sorted label tuple -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+stage_seconds = Histogram("fitaura_stage_seconds", "Time spent in each stage of handling a message.")
+request_seconds = Histogram("fitaura_request_seconds", "End-to-end HTTP request latency.")
+intent_requests = Counter("fitaura_intent_requests_total", "Messages handled, by recognized intent.")
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def collect_stages():
+    # Per-request totals of every stage observed inside the block (tasks it spawns included)
+    stages = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_parse():
+    # Time between the request arriving and the endpoint starting: routing, body read and validation
+    start = _request_start.get()
+    if start is not None:
+        observe_stage("parse", time.perf_counter() - start)
+
+
+class TimingMiddleware:
+    """ASGI middleware that stamps the request start time and records total latency per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = _request_start.set(start)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_start.reset(token)
+            route = scope.get("route")
+            request_seconds.observe(time.perf_counter() - start, route=getattr(route, "path", "unmatched"))
+
+
+def render_gauges(prefix: str, stats: dict):
+    # Flatten the numeric values of a component's stats() dict into gauges
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return lines
+
+
+def render_labeled_gauges(prefix: str, label: str, stats_by_label: dict):
+    # One gauge family per numeric key, with a series per label value (e.g. per tenant)
+    families = {}
+    for label_value, stats in stats_by_label.items():
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            families.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{_format_labels(((label, label_value),))} {value}")
+    lines = []
+    for name, series in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(series)
+    return lines
+
+
+def render_metrics(component_stats: dict, tenant_stats=None):
+    lines = []
+    for metric in (stage_seconds, request_seconds, intent_requests):
+        lines.extend(metric.render())
+    for component, stats in component_stats.items():
+        lines.extend(render_gauges(f"fitaura_{component}", stats))
+    if tenant_stats:
+        lines.extend(render_labeled_gauges("fitaura_tenant", "tenant", tenant_stats))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,116 @@
+import zlib
+
+import numpy as np
+import regex as re
+
+_word_pattern = re.compile(r"\w+")
+
+
+class HashedNgramEmbedder:
+    """Embeds text as signed, hashed word and character-trigram counts (no model download, CPU only)."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def features(self, text: str):
+        words = _word_pattern.findall(text.lower())
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self.features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        # Sublinear term frequency, then unit length so a dot product is the cosine
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# Keyword results that send the user to a clarification round trip or a canned reply
+INCONCLUSIVE_INTENTS = ["default", "common"]
+
+
+class IntentClassifier:
+    """Nearest-prototype intent model over hashed word and character-trigram features.
+
+    Every keyword and example phrasing is a prototype of its label. A label scores the
+    cosine similarity of its closest prototype, computed for a whole batch with one matrix
+    product, and a softmax over the label scores gives the confidence. (Per-label centroids
+    blurred the small example sets together; the closest prototype separates them better.)
+    """
+
+    def __init__(self, labels, prototypes, offsets, embedder, temperature: float = 10.0):
+        self.labels = list(labels)
+        self.prototypes = prototypes  # rows grouped by label, label i starting at offsets[i]
+        self.offsets = offsets
+        self.embedder = embedder
+        self.temperature = temperature
+        self.predictions = 0
+
+    @classmethod
+    def train(cls, examples_by_label, dim: int = 1024, temperature: float = 10.0):
+        embedder = HashedNgramEmbedder(dim)
+        labels = [label for label, examples in examples_by_label.items() if examples]
+        rows = [embedder.embed(example) for label in labels for example in examples_by_label[label]]
+        offsets = np.cumsum([0] + [len(examples_by_label[label]) for label in labels[:-1]])
+        return cls(labels, np.stack(rows).astype(np.float32), offsets, embedder, temperature)
+
+    def probabilities(self, texts):
+        # (len(texts), len(labels)) matrix of label probabilities
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        vectors = np.stack([self.embedder.embed(text) for text in texts])
+        similarities = vectors @ self.prototypes.T
+        logits = self.temperature * np.maximum.reduceat(similarities, self.offsets, axis=1)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        self.predictions += len(texts)
+        return probabilities
+
+    def predict_many(self, texts):
+        # Returns [(label, confidence)] in input order
+        probabilities = self.probabilities(texts)
+        return [(self.labels[index], float(probabilities[row, index])) for row, index in enumerate(probabilities.argmax(axis=1))]
+
+    def predict(self, text: str):
+        return self.predict_many([text])[0]
+
+    def stats(self):
+        return {"labels": len(self.labels), "prototypes": len(self.prototypes), "predictions": self.predictions}
+
+
+def training_examples(keywords, examples, topics):
+    by_label = {intent: list(keywords[intent]) + list(examples.get(intent, [])) for intent in topics}
+    by_label["default"] = list(examples.get("default", []))
+    return by_label
+
+
+def classify_with(matcher, classifier, topics, user_inputs, threshold: float):
+    """Keyword match first; inconclusive results go to the classifier in one batch.
+
+    Returns [(intent, confidence)]. Keyword hits have confidence 1.0. The best topic intent
+    replaces "default"/"common" when its probability reaches threshold; otherwise the keyword
+    result stays, with confidence one minus that probability.
+    """
+    intents = matcher.match_many(user_inputs)
+    results = [(intent, 1.0) for intent in intents]
+    pending = [index for index, intent in enumerate(intents) if intent in INCONCLUSIVE_INTENTS]
+    columns = [classifier.labels.index(intent) for intent in topics if intent in classifier.labels]
+    if not pending or not columns:
+        return results
+
+    probabilities = classifier.probabilities([user_inputs[index] for index in pending])
+    for row, index in enumerate(pending):
+        best = max(columns, key=lambda column: probabilities[row, column])
+        confidence = float(probabilities[row, best])
+        if confidence >= threshold:
+            results[index] = (classifier.labels[best], confidence)
+        else:
+            results[index] = (intents[index], 1.0 - confidence)
+    return results
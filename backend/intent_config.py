@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from types import MappingProxyType
+
+from intent_classifier import IntentClassifier, classify_with, training_examples
+from intents import INTENT_CONFIG_FILE, IntentMatcher, load_intent_tables
+
+logger = logging.getLogger("fitaura")
+
+
+class IntentSnapshot:
+    """Compiled, read-only intent tables: keyword matcher, classifier and canned replies.
+
+    Requests read the current snapshot once and use it throughout, so a reload swapping
+    in a new one never changes the tables halfway through a request.
+    """
+
+    def __init__(self, tables, version: int, digest: str, source: str):
+        start = time.perf_counter()
+        self.priority_intents = tuple(tables["priority_intents"])
+        self.fallback_intents = tuple(tables["fallback_intents"])
+        self.responses = MappingProxyType({intent: tuple(replies) for intent, replies in tables["intent_responses"].items()})
+        self.keywords = MappingProxyType({intent: tuple(words) for intent, words in tables["intent_keywords"].items()})
+        self.matcher = IntentMatcher(tables["intent_keywords"], self.priority_intents + self.fallback_intents)
+        self.classifier = IntentClassifier.train(
+            training_examples(tables["intent_keywords"], tables["intent_examples"], self.priority_intents)
+        )
+        self.compile_seconds = time.perf_counter() - start
+        self.version = version
+        self.digest = digest
+        self.source = source
+        self.loaded_at = time.time()
+
+    def recognize(self, user_input: str):
+        # Keyword match alone, without the classifier
+        return self.matcher.match(user_input)
+
+    def classify(self, user_input: str, threshold: float):
+        return self.classify_many([user_input], threshold)[0]
+
+    def classify_many(self, user_inputs, threshold: float):
+        return classify_with(self.matcher, self.classifier, self.priority_intents, user_inputs, threshold)
+
+    def reply(self, intent: str):
+        return random.choice(self.responses.get(intent) or self.responses["default"])
+
+    def info(self):
+        return {
+            "version": self.version,
+            "digest": self.digest,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "compile_ms": round(1000 * self.compile_seconds, 3),
+            "keywords": len(self.matcher.keyword_rank),
+            "prototypes": len(self.classifier.prototypes),
+        }
+
+
+def load_snapshot(path: str = INTENT_CONFIG_FILE):
+    # One-off snapshot for scripts and benchmarks; the API keeps its own in IntentConfigWatcher
+    with open(path, "rb") as config_file:
+        digest = hashlib.sha256(config_file.read()).hexdigest()[:12]
+    return IntentSnapshot(load_intent_tables(path), 1, digest, path)
+
+
+class IntentConfigWatcher:
+    """Holds the active IntentSnapshot and rebuilds it when the config file changes.
+
+    watch() polls the file's mtime and size; a changed file is parsed and compiled on a
+    worker thread and then swapped in with a single assignment. A file that fails to load
+    is logged and the previous snapshot stays active.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.current = None
+        self.reload()
+        if self.current is None:
+            raise ValueError(f"could not load intent config {path}: {self.last_error}")
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = True):
+        # Returns True when a new snapshot was swapped in
+        with self._lock:
+            try:
+                signature = self._file_signature()
+                if not force and signature == self._signature:
+                    return False
+                with open(self.path, "rb") as config_file:
+                    digest = hashlib.sha256(config_file.read()).hexdigest()[:12]
+                self._signature = signature
+                if self.current is not None and digest == self.current.digest:
+                    # Back to the active content, e.g. a broken edit was reverted
+                    self.last_error = None
+                    return False
+                version = self.current.version + 1 if self.current else 1
+                snapshot = IntentSnapshot(load_intent_tables(self.path), version, digest, self.path)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error("Intent config %s not loaded, keeping the active snapshot: %s", self.path, self.last_error)
+                return False
+            self.current = snapshot
+            self.reloads += 1
+            self.last_error = None
+            logger.info("Intent config %s loaded: %s", self.path, snapshot.info())
+            return True
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await asyncio.to_thread(self.reload, False)
+
+    def stats(self):
+        return {**self.current.info(), "reloads": self.reloads, "failures": self.failures, "last_error": self.last_error}
@@ -0,0 +1,69 @@
+import json
+import os
+
+import regex as re
+
+# Intent tables live in intents.json (or INTENT_CONFIG_FILE) so they can be tuned without a
+# code change. This module only loads and validates them; intent_config.IntentSnapshot compiles
+# them, and the running API reloads the file on change
+DEFAULT_INTENT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.json")
+INTENT_CONFIG_FILE = os.getenv("INTENT_CONFIG_FILE", DEFAULT_INTENT_CONFIG)
+
+# Intents the rest of the app refers to by name, so every config must define them
+REQUIRED_INTENTS = ["workout_plan", "nutrition_advice", "skincare", "common", "greeting", "goodbye", "default"]
+
+
+def load_intent_tables(path: str):
+    with open(path, encoding="utf-8") as config_file:
+        tables = json.load(config_file)
+
+    for key in ("intent_responses", "intent_keywords", "priority_intents", "fallback_intents"):
+        if key not in tables:
+            raise ValueError(f"{path}: missing {key!r}")
+    tables.setdefault("intent_examples", {})
+    missing = [intent for intent in REQUIRED_INTENTS if not tables["intent_responses"].get(intent)]
+    if missing:
+        raise ValueError(f"{path}: no intent_responses for {missing}")
+    unknown = [intent for intent in tables["priority_intents"] + tables["fallback_intents"] if intent not in tables["intent_keywords"]]
+    if unknown:
+        raise ValueError(f"{path}: no intent_keywords for {unknown}")
+    return tables
+
+
+class IntentMatcher:
+    """Single-pass keyword matcher compiled once from an intent keyword table.
+
+    All keywords are folded into one word-bounded alternation, ordered by intent
+    priority. Scanning with overlapped matches visits every start position, and at
+    each position the alternation yields the highest-priority keyword that matches
+    there, so the lowest rank seen over the whole scan is the intent the old
+    per-keyword loop would have returned.
+    """
+
+    def __init__(self, keywords, order):
+        # order: priority_intents followed by fallback_intents
+        self.order = list(order)
+        self.keyword_rank = {}
+        for rank, intent in enumerate(self.order):
+            for keyword in keywords.get(intent, []):
+                self.keyword_rank.setdefault(keyword.lower(), rank)
+
+        alternation = "|".join(re.escape(keyword) for keyword in self.keyword_rank)
+        self.pattern = re.compile(r"\b(?:" + alternation + r")\b") if self.keyword_rank else None
+
+    def match(self, user_input: str):
+        if self.pattern is None:
+            return "default"
+
+        best = len(self.order)
+        for found in self.pattern.finditer(user_input.lower(), overlapped=True):
+            rank = self.keyword_rank[found.group()]
+            if rank < best:
+                best = rank
+                if best == 0:
+                    break
+
+        return self.order[best] if best < len(self.order) else "default"
+
+    def match_many(self, user_inputs):
+        return [self.match(user_input) for user_input in user_inputs]
@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+
+class TenantQueueStats:
+    def __init__(self):
+        self.waiting = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self):
+        return {
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "avg_queue_wait_ms": round(1000 * self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(1000 * self.max_wait, 3),
+        }
+
+
+class LLMGate:
+    """Caps the number of LLM calls in flight and records how long callers queue for a slot.
+
+    When every slot is busy, waiters are admitted in weighted fair order across tenants
+    (start-time fair queuing): a tenant with weight w gets about w times the slots of a
+    weight-1 tenant, and one tenant's backlog cannot starve the others.
+    """
+
+    def __init__(self, max_in_flight: int, weights=None, max_tenants: int = 1000):
+        self.max_in_flight = max_in_flight
+        self.weights = dict(weights or {})
+        self.max_tenants = max_tenants
+        self._queue = []  # heap of (start tag, seq, future)
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags = {}  # tenant -> finish tag of its last queued request
+        self._tenants = OrderedDict()  # tenant -> TenantQueueStats, least recently used first
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _tenant_stats(self, tenant: str):
+        stats = self._tenants.get(tenant)
+        if stats is None:
+            stats = self._tenants[tenant] = TenantQueueStats()
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+        self._tenants.move_to_end(tenant)
+        return stats
+
+    async def _acquire(self, tenant: str, tenant_stats):
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            return
+
+        start_tag = max(self._virtual_time, self._finish_tags.get(tenant, 0.0))
+        self._finish_tags[tenant] = start_tag + 1.0 / self.weights.get(tenant, 1.0)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (start_tag, next(self._seq), future))
+        self.waiting += 1
+        tenant_stats.waiting += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Cancelled after the slot was already handed over: pass it on
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            self.waiting -= 1
+            tenant_stats.waiting -= 1
+
+    def _release(self):
+        while self._queue:
+            start_tag, _, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            # The slot moves straight to the next waiter, so in_flight is unchanged
+            self._virtual_time = start_tag
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+        self._finish_tags.clear()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str = "", timeout=None):
+        # timeout bounds the queue wait; asyncio.TimeoutError leaves the queue without a slot
+        start = time.perf_counter()
+        tenant_stats = self._tenant_stats(tenant)
+        await asyncio.wait_for(self._acquire(tenant, tenant_stats), timeout)
+
+        wait = time.perf_counter() - start
+        for stats in (self, tenant_stats):
+            stats.admitted += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+        try:
+            yield wait
+        finally:
+            self._release()
+
+    def tenant_stats(self):
+        return {tenant: stats.as_dict() for tenant, stats in self._tenants.items()}
+
+    def stats(self):
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "avg_queue_wait_ms": round(1000 * self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(1000 * self.max_wait, 3),
+            "tenants": len(self._tenants),
+        }
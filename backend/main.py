@@ -1,6 +1,6 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -8,11 +8,29 @@ dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".en
 load_dotenv(dotenv_path)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Configure the Google Gemini API client
-genai.configure(api_key=GEMINI_API_KEY)
+# One Gemini model shared by every request; built at startup instead of per /generate/ call
+_model = None
+
+
+def get_model():
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+
+        # Configure the Google Gemini API client
+        genai.configure(api_key=GEMINI_API_KEY)
+        _model = genai.GenerativeModel("gemini-1.5-flash")
+    return _model
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_model()
+    yield
+
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def read_root():
@@ -22,9 +40,9 @@ async def read_root():
 @app.post("/generate/")
 async def generate_text(prompt: str):
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        
+        model = get_model()
+        response = await model.generate_content_async(prompt)
+
         return {"response": response.text if response and response.text else "No response received."}
     except Exception as e:
         return {"error": str(e)}
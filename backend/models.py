@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+
+
+def build_gemini(model_name: str, **options):
+    # Imported here so loading the app (and the intent logic) needs neither the SDK nor credentials
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    google_api_key = os.getenv("GEMINI_API_KEY")
+    if google_api_key is None:
+        raise ValueError("GEMINI_API_KEY is not found. Please set it in the .env file.")
+    os.environ["GOOGLE_API_KEY"] = google_api_key  # Ensure API key is available globally
+
+    return ChatGoogleGenerativeAI(model=model_name, **options)
+
+
+class ModelRegistry:
+    """Builds chat model clients on first use (or when warmed) and reuses them across requests."""
+
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._build_seconds = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory):
+        self._factories[name] = factory
+
+    def set(self, name: str, model):
+        # Install a ready-made client, e.g. a fake model for benchmarks
+        with self._lock:
+            self._models[name] = model
+            self._build_seconds[name] = 0.0
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                if name not in self._factories:
+                    raise KeyError(f"No model registered as {name!r}")
+                start = time.perf_counter()
+                model = self._factories[name]()
+                self._build_seconds[name] = time.perf_counter() - start
+                self._models[name] = model
+        return model
+
+    def names(self):
+        return sorted(self._factories)
+
+    def warm(self, names):
+        for name in names:
+            self.get(name)
+
+    def stats(self):
+        return {
+            "registered": self.names(),
+            "built": {name: round(seconds, 4) for name, seconds in self._build_seconds.items()},
+        }
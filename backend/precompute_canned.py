@@ -0,0 +1,72 @@
+"""Offline job that fills the canned-answer store used by /send_message.
+
+Generates an answer for every templated "Yes" follow-up x gender x age bucket.
+Rows whose prompt fingerprint still matches are skipped, so re-running after a
+prompt change regenerates only the stale entries.
+
+    python precompute_canned.py --db canned_answers.db
+    python precompute_canned.py --db canned_answers.db --invalidate "workout plan"
+    CANNED_ANSWERS_DB=canned_answers.db uvicorn app:app
+"""
+import argparse
+import asyncio
+
+import app as backend
+from canned import (
+    AGE_BUCKET_YEARS, GENDERS, CannedStore, age_buckets, follow_up_queries, prompt_fingerprint, representative_age,
+)
+
+
+async def precompute(store: CannedStore, force: bool, concurrency: int):
+    model = backend.model_registry.get(backend.DEFAULT_MODEL)
+    # The API's own snapshot, so the follow-ups and intents match what it will serve
+    snapshot = backend.intent_config.current
+    semaphore = asyncio.Semaphore(concurrency)
+    generated = skipped = failed = 0
+
+    async def fill(query: str, gender: str, bucket: int):
+        nonlocal generated, skipped, failed
+        request = backend.QueryRequest(
+            query=query, name="precompute", email="", age=representative_age(bucket * AGE_BUCKET_YEARS), gender=gender
+        )
+        messages = backend.canned_prompt(request, snapshot.recognize(query))
+        fingerprint = prompt_fingerprint(messages)
+        if not force and store.fingerprint_of(query, gender, bucket) == fingerprint:
+            skipped += 1
+            return
+        async with semaphore:
+            try:
+                response = await model.ainvoke(messages)
+            except Exception as e:
+                failed += 1
+                print(f"  failed: {gender} bucket {bucket}: {query!r}: {e}")
+                return
+        store.put(query, gender, bucket, fingerprint, response.content)
+        generated += 1
+
+    await asyncio.gather(*(
+        fill(query, gender, bucket)
+        for query in follow_up_queries(snapshot.responses)
+        for gender in GENDERS
+        for bucket in age_buckets()
+    ))
+    print(f"generated {generated}, up to date {skipped}, failed {failed}, stored {store.stats()['entries']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute canned answers for templated follow-up prompts")
+    parser.add_argument("--db", default="canned_answers.db")
+    parser.add_argument("--force", action="store_true", help="regenerate entries even if their prompt is unchanged")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--invalidate", metavar="TEXT", help="delete entries whose query contains TEXT and exit")
+    args = parser.parse_args()
+
+    store = CannedStore(args.db)
+    if args.invalidate is not None:
+        print(f"invalidated {store.invalidate(args.invalidate)} entries")
+        return
+    asyncio.run(precompute(store, args.force, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
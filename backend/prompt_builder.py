@@ -0,0 +1,106 @@
+import asyncio
+
+import regex as re
+
+_piece_pattern = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str):
+    # Local approximation of a subword tokenizer: one token per punctuation mark,
+    # and roughly one token per four characters of each word
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _piece_pattern.findall(text))
+
+
+class PromptBuilder:
+    """Assembles the chat messages for a request within a token budget.
+
+    The newest history lines are kept first; older ones are dropped once the budget
+    is spent. For server-side sessions, turns beyond summarize_after are folded into
+    a running summary in the background, so the summary is generated once and reused
+    by every later turn instead of being recomputed per call.
+    """
+
+    def __init__(self, token_budget: int, summarize_after: int = 12, keep_recent: int = 6, summarizer=None):
+        self.token_budget = token_budget
+        self.summarize_after = summarize_after
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        self._tasks = set()
+        self.requests = 0
+        self.total_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.dropped_lines = 0
+        self.summaries = 0
+        self.summary_failures = 0
+
+    def build(self, system_message: str, query: str, history_lines, summary: str = ""):
+        header = "Current Question: " + query + "\n" + "Previous Questions: "
+        used = estimate_tokens(system_message) + estimate_tokens(header)
+
+        if summary:
+            summary_line = "Summary of earlier conversation: " + summary
+            if used + estimate_tokens(summary_line) <= self.token_budget:
+                used += estimate_tokens(summary_line)
+            else:
+                summary_line = ""
+        else:
+            summary_line = ""
+
+        kept = []
+        for line in reversed(history_lines):
+            cost = estimate_tokens(line)
+            if used + cost > self.token_budget:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+        if summary_line:
+            kept.insert(0, summary_line)
+
+        dropped = len(history_lines) - (len(kept) - (1 if summary_line else 0))
+        self.requests += 1
+        self.total_prompt_tokens += used
+        self.max_prompt_tokens = max(self.max_prompt_tokens, used)
+        self.dropped_lines += dropped
+
+        messages = [
+            ("system", system_message),
+            ("human", header + "\n".join(kept)),
+        ]
+        info = {"prompt_tokens": used, "history_lines": len(kept), "dropped_lines": dropped, "summary": bool(summary_line)}
+        return messages, info
+
+    def maybe_summarize(self, session, tenant: str = ""):
+        turns, _ = session.snapshot()
+        if self.summarizer is None or session.summarizing or len(turns) <= self.summarize_after:
+            return
+        folded = turns[:-self.keep_recent] if self.keep_recent else turns
+        if not folded:
+            return
+        session.summarizing = True
+        task = asyncio.create_task(self._fold(session, [f"User: {query}" for _, query in folded], folded[-1][0], tenant))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fold(self, session, lines, upto_seq: int, tenant: str):
+        try:
+            summary = await self.summarizer(session.summary, lines, tenant)
+            # fold may persist the summary to SQLite, so keep it off the event loop
+            await asyncio.to_thread(session.fold, summary, upto_seq)
+            self.summaries += 1
+        except Exception:
+            # Keep the raw turns; the next request will try again
+            self.summary_failures += 1
+        finally:
+            session.summarizing = False
+
+    def stats(self):
+        return {
+            "token_budget": self.token_budget,
+            "requests": self.requests,
+            "avg_prompt_tokens": round(self.total_prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "dropped_lines": self.dropped_lines,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+        }
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+
+
+class RateLimited(Exception):
+    """Raised when a tenant has used up its token bucket."""
+
+    def __init__(self, tenant: str, retry_after: float):
+        super().__init__(f"rate limit exceeded for {tenant!r}, retry in {retry_after:.1f}s")
+        self.tenant = tenant
+        self.retry_after = retry_after
+
+
+def refill(tokens: float, updated_at: float, now: float, burst: float, refill_per_second: float):
+    return min(burst, tokens + max(0.0, now - updated_at) * refill_per_second)
+
+
+def take(tokens: float, cost: float, refill_per_second: float):
+    # Returns (tokens left, seconds until the request could be admitted); 0.0 means admitted now
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    if refill_per_second <= 0:
+        return tokens, float("inf")
+    return tokens, (cost - tokens) / refill_per_second
+
+
+class MemoryBuckets:
+    """Token buckets for one worker process, least recently used tenants dropped first."""
+
+    blocking = False
+
+    def __init__(self, max_tenants: int = 10000):
+        self.max_tenants = max_tenants
+        self._buckets = OrderedDict()  # tenant -> [tokens, updated_at]
+
+    def take(self, tenant: str, cost: float, burst: float, refill_per_second: float):
+        now = time.time()
+        bucket = self._buckets.get(tenant)
+        tokens = burst if bucket is None else refill(bucket[0], bucket[1], now, burst, refill_per_second)
+        tokens, retry_after = take(tokens, cost, refill_per_second)
+        self._buckets[tenant] = [tokens, now]
+        self._buckets.move_to_end(tenant)
+        while len(self._buckets) > self.max_tenants:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Per-tenant token bucket: bursts of up to `burst` requests, refilled at `refill_per_second`.
+
+    Buckets live in this process by default; pass shared_state.SharedTokenBuckets so every
+    worker draws from the same bucket.
+    """
+
+    def __init__(self, burst: float, refill_per_second: float, buckets=None):
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self.buckets = buckets if buckets is not None else MemoryBuckets()
+        self.enabled = burst > 0 and refill_per_second > 0
+        self.blocking = getattr(self.buckets, "blocking", False)
+        self.admitted = 0
+        self.limited = 0
+
+    def acquire(self, tenant: str, cost: float = 1):
+        if not self.enabled:
+            return
+        retry_after = self.buckets.take(tenant, cost, self.burst, self.refill_per_second)
+        if retry_after > 0:
+            self.limited += 1
+            raise RateLimited(tenant, retry_after)
+        self.admitted += 1
+
+    def stats(self):
+        return {
+            "burst": self.burst,
+            "refill_per_second": self.refill_per_second,
+            "admitted": self.admitted,
+            "limited": self.limited,
+            "tenants": len(self.buckets),
+        }
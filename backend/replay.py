@@ -0,0 +1,151 @@
+"""Replay captured /send_message traffic in-process against the fake LLM, with profiling.
+
+Record traffic with CAPTURE_FILE, then replay it at the captured pacing divided by
+--speedup (0 sends everything at once, bounded by --concurrency). Prints per-stage
+latency for the capture next to the replay, and writes a cProfile file (open it with
+snakeviz or flameprof) or a pyinstrument HTML flame graph.
+
+    CAPTURE_FILE=capture.ndjson uvicorn app:app
+    python replay.py capture.ndjson --speedup 10 --profile replay.prof
+    python replay.py capture.ndjson --speedup 0 --pyinstrument replay.html
+"""
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from benchmark import percentile
+from capture import read_capture
+
+# Stages in the order a request passes through them; anything else is listed after
+STAGE_ORDER = ["parse", "history", "intent", "prompt_build", "llm_queue", "llm", "serialize"]
+
+
+async def replay(app, entries, speedup: float, concurrency: int):
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = Counter()
+    latencies = []
+    loop = asyncio.get_running_loop()
+    first_at = entries[0]["t"]
+    start = loop.time()
+
+    async def send(client, entry):
+        if speedup > 0:
+            await asyncio.sleep(max(0.0, start + (entry["t"] - first_at) / speedup - loop.time()))
+        async with semaphore:
+            sent = time.perf_counter()
+            response = await client.post("/send_message", json=entry["request"])
+            latencies.append(time.perf_counter() - sent)
+            statuses[response.status_code] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+        await asyncio.gather(*(send(client, entry) for entry in entries))
+    return latencies, loop.time() - start, statuses
+
+
+def stage_samples(entries):
+    samples = {}
+    for entry in entries:
+        for stage, ms in entry["stages_ms"].items():
+            samples.setdefault(stage, []).append(ms)
+        samples.setdefault("handler", []).append(entry["handler_ms"])
+    return samples
+
+
+def print_breakdown(captured, replayed):
+    captured, replayed = stage_samples(captured), stage_samples(replayed)
+    stages = [stage for stage in STAGE_ORDER if stage in captured or stage in replayed]
+    stages += sorted((set(captured) | set(replayed)) - set(stages) - {"handler"}) + ["handler"]
+
+    def cell(samples):
+        if not samples:
+            return f"{'-':>28s}"
+        return f"{percentile(samples, 50):8.2f} {percentile(samples, 95):9.2f} {statistics.mean(samples):9.2f}"
+
+    print(f"  {'stage (ms)':14s} {'captured p50':>12s} {'p95':>9s} {'mean':>9s}   {'replayed p50':>12s} {'p95':>9s} {'mean':>9s}")
+    for stage in stages:
+        print(f"  {stage:14s} {cell(captured.get(stage))}       {cell(replayed.get(stage))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /send_message traffic against the fake LLM")
+    parser.add_argument("capture", help="NDJSON file written with CAPTURE_FILE")
+    parser.add_argument("--speedup", type=float, default=1.0, help="pacing divisor; 0 replays as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=64, help="maximum requests in flight")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake first-token latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--rate-limit", action="store_true", help="keep per-user rate limiting on")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--profile", metavar="PATH", help="write cProfile stats to PATH")
+    output.add_argument("--pyinstrument", metavar="PATH", help="write a pyinstrument HTML profile to PATH")
+    parser.add_argument("--top", type=int, default=25, help="functions to print from the cProfile stats")
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    args = parser.parse_args()
+
+    entries = sorted(read_capture(args.capture), key=lambda entry: entry["t"])
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        parser.error(f"{args.capture} has no captured requests")
+
+    # Configure the app before importing it: fake model, no shared state, and a capture of its own
+    replay_capture = tempfile.NamedTemporaryFile(prefix="replay-", suffix=".ndjson", delete=False).name
+    for name in ("SHARED_STATE_DIR", "RESPONSE_CACHE_DB", "SESSION_DB"):
+        os.environ.pop(name, None)
+    os.environ.update(
+        LLM_BACKEND="fake", FAKE_LLM_LATENCY=str(args.latency), FAKE_LLM_TOKENS_PER_SECOND=str(args.tokens_per_second),
+        PREWARM_MODELS="", INTENT_CONFIG_POLL_SECONDS="0", LOG_LEVEL="WARNING",
+        CAPTURE_FILE=replay_capture, CAPTURE_SAMPLE_RATE="1", CAPTURE_REDACT="0",
+    )
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_BURST"] = "0"
+    import app as backend
+
+    print(f"replaying {len(entries)} requests from {args.capture} at speedup {args.speedup or 'max'}")
+    if args.pyinstrument:
+        from pyinstrument import Profiler  # optional: pip install pyinstrument
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        latencies, elapsed, statuses = asyncio.run(replay(backend.app, entries, args.speedup, args.concurrency))
+        profiler.stop()
+        with open(args.pyinstrument, "w", encoding="utf-8") as html_file:
+            html_file.write(profiler.output_html())
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        latencies, elapsed, statuses = asyncio.run(replay(backend.app, entries, args.speedup, args.concurrency))
+        profiler.disable()
+
+    backend.capture_log.close()
+    replayed = read_capture(replay_capture)
+    os.unlink(replay_capture)
+
+    print(
+        f"  {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)  "
+        f"p50 {1000 * percentile(latencies, 50):.1f} ms  p95 {1000 * percentile(latencies, 95):.1f} ms  "
+        f"status {dict(statuses)}"
+    )
+    print_breakdown(entries, replayed)
+
+    if args.pyinstrument:
+        print(f"pyinstrument profile written to {args.pyinstrument}")
+        return
+    if args.profile:
+        profiler.dump_stats(args.profile)
+        print(f"cProfile stats written to {args.profile}")
+    print(f"top {args.top} functions by {args.sort}:")
+    pstats.Stats(profiler).sort_stats(args.sort).print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
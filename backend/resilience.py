@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through once the cooldown passes."""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def available(self):
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_cancelled(self):
+        # A cancelled probe says nothing about the upstream; let the next request probe instead
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self):
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+async def hedged(call, hedge_delay, timeout):
+    """Await call(); if it is still running after hedge_delay, start a second copy and keep whichever succeeds first.
+
+    Returns (result, whether a hedge was fired). Raises asyncio.TimeoutError once timeout passes,
+    or the last error if every copy fails.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + timeout if timeout is not None else None
+    tasks = {asyncio.ensure_future(call())}
+    hedge_fired = hedge_delay is None
+    try:
+        while True:
+            wake = deadline
+            if not hedge_fired and (wake is None or start + hedge_delay < wake):
+                wake = start + hedge_delay
+            done, _ = await asyncio.wait(
+                tasks, timeout=None if wake is None else max(0.0, wake - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+
+            error = None
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None:
+                    return task.result(), hedge_delay is not None and hedge_fired
+                error = task.exception()
+            if not tasks:
+                raise error
+
+            if deadline is not None and loop.time() >= deadline:
+                raise asyncio.TimeoutError()
+            if not hedge_fired and loop.time() >= start + hedge_delay:
+                tasks.add(asyncio.ensure_future(call()))
+                hedge_fired = True
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def bounded_stream(stream, timeout):
+    """Yield from the async iterator stream until it ends; raise asyncio.TimeoutError once timeout seconds pass.
+
+    The stream is closed on timeout or error, so the underlying request is not left running.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    chunks = stream.__aiter__()
+    try:
+        while True:
+            next_chunk = chunks.__anext__()
+            try:
+                if deadline is None:
+                    chunk = await next_chunk
+                else:
+                    chunk = await asyncio.wait_for(next_chunk, max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
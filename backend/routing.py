@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+
+from prompt_builder import estimate_tokens
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged
+
+# USD per million tokens (input, output), used for cost accounting only
+MODEL_PRICES = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+# Checked in order; the first route whose "match" conditions all hold wins.
+# Supported conditions: intents, query_contains, max_query_tokens, max_history_lines.
+DEFAULT_POLICY = [
+    {
+        # Background session summaries (app.summarize_history), not user questions
+        "name": "summary",
+        "model": "gemini-1.5-flash",
+        "fallback": "gemini-1.5-pro",
+        "timeout": 15,
+        "match": {"intents": ["summary"]},
+    },
+    {
+        "name": "follow_up",
+        "model": "gemini-1.5-flash",
+        "fallback": "gemini-1.5-pro",
+        "timeout": 15,
+        "match": {"query_contains": ["User responded Yes", "User clarified"]},
+    },
+    {
+        "name": "short_question",
+        "model": "gemini-1.5-flash",
+        "fallback": "gemini-1.5-pro",
+        "timeout": 15,
+        "match": {"max_query_tokens": 16, "max_history_lines": 2},
+    },
+    {
+        "name": "personalised_plan",
+        "model": "gemini-1.5-pro",
+        "fallback": "gemini-1.5-flash",
+        "timeout": 30,
+    },
+]
+
+
+def load_policy(path: str):
+    if not path:
+        return DEFAULT_POLICY
+    with open(path, encoding="utf-8") as policy_file:
+        return json.load(policy_file)
+
+
+class RouteStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0
+        self.hedges = 0
+        self.total_latency = 0.0
+        self.cost = 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "hedges": self.hedges,
+            "avg_latency_ms": round(1000 * self.total_latency / self.calls, 1) if self.calls else 0.0,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class ModelRouter:
+    """Picks a model per request from a policy table and calls it defensively.
+
+    Each call is bounded by the route timeout and the request deadline, is hedged with a
+    second copy once it runs past the model's recent p95 latency, and falls back to the
+    route's other model on timeout or error. Every model has a circuit breaker; open
+    breakers are skipped, and a route with no available model should not be called at all.
+    """
+
+    def __init__(self, registry, policy, hedging: bool = True, breaker_threshold: int = 5, breaker_cooldown: float = 30.0):
+        self.registry = registry
+        self.policy = list(policy)
+        self.hedging = hedging
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.stats_by_route = {route["name"]: RouteStats() for route in self.policy}
+        self.breakers = {}
+        self.latencies = {}
+
+    def choose(self, intent: str, query: str, history_lines: int):
+        query_tokens = estimate_tokens(query)
+        for route in self.policy:
+            match = route.get("match", {})
+            if "intents" in match and intent not in match["intents"]:
+                continue
+            if "query_contains" in match and not any(text in query for text in match["query_contains"]):
+                continue
+            if "max_query_tokens" in match and query_tokens > match["max_query_tokens"]:
+                continue
+            if "max_history_lines" in match and history_lines > match["max_history_lines"]:
+                continue
+            return route
+        return self.policy[-1]
+
+    def breaker(self, model_name: str):
+        breaker = self.breakers.get(model_name)
+        if breaker is None:
+            breaker = self.breakers[model_name] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return breaker
+
+    def _models(self, route):
+        return [route["model"]] + ([route["fallback"]] if route.get("fallback") else [])
+
+    def available(self, route):
+        return any(self.breaker(model_name).available() for model_name in self._models(route))
+
+    def stream_models(self, route):
+        # [(name, model)] of the route whose breaker is not open, in fallback order, for callers that stream directly
+        return [(model_name, self.registry.get(model_name)) for model_name in self._models(route) if self.breaker(model_name).available()]
+
+    def _account(self, stats, model_name: str, messages, content: str, latency: float):
+        input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+        input_tokens = sum(estimate_tokens(text) for _, text in messages)
+        stats.total_latency += latency
+        stats.cost += (input_tokens * input_price + estimate_tokens(content) * output_price) / 1_000_000
+
+    async def _attempt(self, stats, model_name: str, messages, timeout):
+        breaker = self.breaker(model_name)
+        if not breaker.allow():
+            raise CircuitOpenError(model_name)
+        tracker = self.latencies.setdefault(model_name, LatencyTracker())
+        model = self.registry.get(model_name)
+
+        start = time.perf_counter()
+        try:
+            response, was_hedged = await hedged(
+                lambda: model.ainvoke(messages), tracker.p95() if self.hedging else None, timeout
+            )
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        tracker.add(time.perf_counter() - start)
+        if was_hedged:
+            stats.hedges += 1
+        return response
+
+    async def invoke(self, route, messages, deadline=None):
+        # deadline is an absolute time.monotonic() value, or None for the route timeout alone
+        stats = self.stats_by_route[route["name"]]
+        stats.calls += 1
+        start = time.perf_counter()
+        model_names = self._models(route)
+        for attempt, model_name in enumerate(model_names):
+            timeout = route.get("timeout")
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stats.failures += 1
+                    raise asyncio.TimeoutError()
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                response = await self._attempt(stats, model_name, messages, timeout)
+            except Exception:
+                if attempt == len(model_names) - 1:
+                    stats.failures += 1
+                    raise
+                stats.fallbacks += 1
+                continue
+
+            self._account(stats, model_name, messages, response.content, time.perf_counter() - start)
+            return response
+
+    def stats(self):
+        return {
+            "routes": {name: stats.as_dict() for name, stats in self.stats_by_route.items()},
+            "breakers": {name: breaker.stats() for name, breaker in self.breakers.items()},
+        }
@@ -0,0 +1,187 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import partial
+
+from shared_state import connect_sqlite
+
+
+class SQLiteSessionTier:
+    """Persists conversation turns and summaries so sessions survive eviction, restarts and other workers."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns (session_id TEXT NOT NULL, query TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, upto_seq INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str, limit: int):
+        # Turns are numbered by rowid, so every worker agrees on which ones a summary already covers
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, upto_seq FROM summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            summary, upto_seq = row if row else ("", -1)
+            rows = self._conn.execute(
+                "SELECT rowid, query FROM turns WHERE session_id = ? AND rowid > ? ORDER BY rowid DESC LIMIT ?",
+                (session_id, upto_seq, limit),
+            ).fetchall()
+        return list(reversed(rows)), summary
+
+    def append(self, session_id: str, query: str):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO turns (session_id, query, created_at) VALUES (?, ?, ?)",
+                (session_id, query, time.time()),
+            )
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def save_summary(self, session_id: str, summary: str, upto_seq: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (session_id, summary, upto_seq) VALUES (?, ?, ?)",
+                (session_id, summary, upto_seq),
+            )
+            self._conn.commit()
+
+
+class Session:
+    """Recent turns of one conversation plus the running summary of turns folded out of it.
+
+    Methods may be called from worker threads (the store's SQLite I/O runs off the event loop),
+    so every change to turns and summary happens under the session's lock.
+    """
+
+    def __init__(self, turns, max_turns: int, summary: str = "", on_fold=None):
+        self.lock = threading.RLock()
+        self.turns = deque(maxlen=max_turns)  # (seq, query), oldest first
+        self.next_seq = 0
+        self.summary = summary
+        self.summarizing = False
+        self.last_seen = time.time()
+        self.on_fold = on_fold
+        for seq, query in turns:
+            self.add(query, seq)
+
+    def add(self, query: str, seq=None):
+        with self.lock:
+            seq = self.next_seq if seq is None else seq
+            self.turns.append((seq, query))
+            self.next_seq = seq + 1
+
+    def replace(self, turns, summary: str):
+        with self.lock:
+            self.turns.clear()
+            self.summary = summary
+            for seq, query in turns:
+                self.add(query, seq)
+
+    def queries(self):
+        with self.lock:
+            return [query for _, query in self.turns]
+
+    def snapshot(self):
+        # (turns, summary) read together, so a concurrent fold cannot split them
+        with self.lock:
+            return list(self.turns), self.summary
+
+    def fold(self, summary: str, upto_seq: int):
+        # Replace every turn up to upto_seq with the new summary; persisting it is blocking I/O
+        with self.lock:
+            self.summary = summary
+            while self.turns and self.turns[0][0] <= upto_seq:
+                self.turns.popleft()
+        if self.on_fold:
+            self.on_fold(summary, upto_seq)
+
+
+class SessionStore:
+    """Keeps each session's recent queries in a bounded ring buffer and evicts idle sessions.
+
+    With shared=True (several worker processes over one persist file) the SQLite tier is the
+    source of truth: every get() re-reads the session's turns and summary, so a request can
+    land on any worker.
+    """
+
+    def __init__(self, max_turns: int = 50, idle_ttl: float = 1800, max_sessions: int = 10000, persist=None, shared: bool = False):
+        if shared and persist is None:
+            raise ValueError("shared sessions need a persist tier")
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.persist = persist
+        self.shared = shared
+        self.blocking = persist is not None  # get/append touch SQLite, so callers run them on a thread
+        self._lock = threading.Lock()  # guards _sessions; SQLite I/O happens outside it
+        self._sessions = OrderedDict()  # session_id -> Session, least recently used first
+        self.evicted = 0
+
+    def _new_session(self, session_id: str, turns, summary: str):
+        on_fold = partial(self.persist.save_summary, session_id) if self.persist else None
+        return Session(turns, self.max_turns, summary, on_fold)
+
+    def create(self):
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = self._new_session(session_id, [], "")
+            self._evict()
+        return session_id
+
+    def get(self, session_id: str):
+        # Blocking when persisted: call it from a worker thread, not the event loop
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            turns, summary = self.persist.load(session_id, self.max_turns) if self.persist else ([], "")
+            with self._lock:
+                session = self._sessions.setdefault(session_id, self._new_session(session_id, turns, summary))
+        elif self.shared:
+            # Another worker may have added turns or folded a summary since this copy was read
+            session.replace(*self.persist.load(session_id, self.max_turns))
+        session.last_seen = time.time()
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict()
+        return session
+
+    def cached(self, session_id: str):
+        # The in-memory copy only, without any disk read; None when this worker has not loaded it
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_seen >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def append(self, session_id: str, query: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            session = self.get(session_id)
+        with session.lock:
+            seq = self.persist.append(session_id, query) if self.persist else None
+            session.add(query, seq)
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "turns": sum(len(session.turns) for session in sessions),
+            "evicted": self.evicted,
+            "shared": self.shared,
+        }
@@ -0,0 +1,124 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+from rate_limit import refill, take
+
+
+def connect_sqlite(path: str):
+    # WAL lets several worker processes read while one writes; busy_timeout makes writers wait instead of failing
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class SharedCounters:
+    """Counters kept in a SQLite file so every worker process adds to, and reads, the same totals.
+
+    add() only updates an in-memory delta; a background thread writes the deltas in one
+    transaction every flush_interval seconds, so request handlers never wait on the file.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,), name="counter-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def add(self, name: str, amount: float = 1):
+        with self._lock:
+            self._pending[name] = self._pending.get(name, 0) + amount
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        now = time.time()
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT INTO counters (name, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value, updated_at = excluded.updated_at",
+                [(name, amount, now) for name, amount in pending.items()],
+            )
+            self._conn.commit()
+
+    def _flush_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Locked by another worker for too long; the deltas are lost, not the process
+                pass
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def snapshot(self, prefix: str = ""):
+        # Cluster totals as last flushed, plus this worker's deltas not yet written
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT name, value FROM counters WHERE substr(name, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        totals = {name: value for name, value in rows}
+        with self._lock:
+            for name, amount in self._pending.items():
+                if name.startswith(prefix):
+                    totals[name] = totals.get(name, 0) + amount
+        return totals
+
+
+class SharedTokenBuckets:
+    """rate_limit token buckets stored in SQLite, so the limit holds across worker processes.
+
+    take() can wait on another worker's write lock, so call it from a worker thread.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.isolation_level = None  # explicit BEGIN IMMEDIATE below
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (tenant TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._takes = 0
+
+    def take(self, tenant: str, cost: float, burst: float, refill_per_second: float):
+        with self._lock:
+            # The write lock is held from the read to the update, so two workers cannot spend the same token
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE tenant = ?", (tenant,)).fetchone()
+                tokens = burst if row is None else refill(row[0], row[1], now, burst, refill_per_second)
+                tokens, retry_after = take(tokens, cost, refill_per_second)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (tenant, tokens, updated_at) VALUES (?, ?, ?)", (tenant, tokens, now)
+                )
+                self._takes += 1
+                if self._takes % 1000 == 0 and refill_per_second > 0:
+                    # Buckets idle long enough to be full again are the same as no row at all
+                    self._conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - burst / refill_per_second,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return retry_after
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
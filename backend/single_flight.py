@@ -0,0 +1,29 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one shared task."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def run(self, key, factory):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # Shield so one caller disconnecting does not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight),
+        }
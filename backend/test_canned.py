@@ -0,0 +1,55 @@
+from canned import CannedStore, age_bucket, prompt_fingerprint, representative_age
+
+
+def prompt(age: int):
+    return [("system", f"You are a certified fitness coach for a Male who is {age} years old."), ("human", "legs?")]
+
+
+def test_ages_share_a_bucket_and_its_midpoint():
+    assert age_bucket(31) == age_bucket(38) == 3
+    assert representative_age(31) == representative_age(38) == 35
+
+
+def test_hit_needs_a_matching_fingerprint(tmp_path):
+    store = CannedStore(str(tmp_path / "canned.db"))
+    store.put("legs?", "Male", 3, prompt_fingerprint(prompt(35)), "squats")
+    assert store.get("legs?", "Male", 33, lambda: prompt_fingerprint(prompt(35))) == "squats"
+    assert store.get("legs?", "Female", 33, lambda: prompt_fingerprint(prompt(35))) is None
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+
+def test_stale_fingerprint_is_not_served(tmp_path):
+    store = CannedStore(str(tmp_path / "canned.db"))
+    store.put("legs?", "Male", 3, prompt_fingerprint(prompt(35)), "squats")
+    # The prompt template changed since the answer was generated
+    assert store.get("legs?", "Male", 33, lambda: prompt_fingerprint(prompt(36))) is None
+    assert store.stats()["stale"] == 1
+
+
+def test_fingerprint_is_only_computed_when_a_row_exists(tmp_path):
+    store = CannedStore(str(tmp_path / "canned.db"))
+
+    def fingerprint():
+        raise AssertionError("should not be called")
+
+    assert store.get("legs?", "Male", 33, fingerprint) is None
+
+
+def test_refresh_picks_up_rows_written_by_another_connection(tmp_path):
+    path = str(tmp_path / "canned.db")
+    serving = CannedStore(path)
+    assert not serving.refresh()
+    CannedStore(path).put("legs?", "Male", 3, "fingerprint", "squats")
+    assert serving.refresh()
+    assert serving.fingerprint_of("legs?", "Male", 3) == "fingerprint"
+    assert not serving.refresh()
+
+
+def test_invalidate_removes_matching_rows(tmp_path):
+    store = CannedStore(str(tmp_path / "canned.db"))
+    store.put("legs?", "Male", 3, "fingerprint", "squats")
+    store.put("arms?", "Male", 3, "fingerprint", "curls")
+    assert store.invalidate("legs") == 1
+    assert store.fingerprint_of("legs?", "Male", 3) is None
+    assert store.fingerprint_of("arms?", "Male", 3) == "fingerprint"
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from intent_config import IntentConfigWatcher
+from intents import DEFAULT_INTENT_CONFIG
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(open(DEFAULT_INTENT_CONFIG, encoding="utf-8").read(), encoding="utf-8")
+    return path
+
+
+def edit(path, change):
+    tables = json.loads(path.read_text(encoding="utf-8"))
+    change(tables)
+    path.write_text(json.dumps(tables), encoding="utf-8")
+
+
+def test_valid_change_swaps_in_a_new_snapshot(config_path):
+    watcher = IntentConfigWatcher(str(config_path), poll_interval=0)
+    old = watcher.current
+    assert old.recognize("teach me kettlebell juggling") == "default"
+
+    edit(config_path, lambda tables: tables["intent_keywords"]["workout_plan"].append("kettlebell juggling"))
+    assert watcher.reload(force=False)
+    assert watcher.current.version == 2
+    assert watcher.current.recognize("teach me kettlebell juggling") == "workout_plan"
+    # A request still holding the old snapshot keeps its tables
+    assert old.recognize("teach me kettlebell juggling") == "default"
+
+
+def test_unchanged_content_is_not_recompiled(config_path):
+    watcher = IntentConfigWatcher(str(config_path), poll_interval=0)
+    config_path.write_text(config_path.read_text(encoding="utf-8"), encoding="utf-8")
+    assert not watcher.reload()
+    assert watcher.current.version == 1
+
+
+def test_unparseable_file_keeps_the_active_snapshot(config_path):
+    watcher = IntentConfigWatcher(str(config_path), poll_interval=0)
+    active = watcher.current
+    config_path.write_text("{not json", encoding="utf-8")
+    assert not watcher.reload()
+    assert watcher.current is active
+    assert watcher.failures == 1
+    assert watcher.last_error.startswith("JSONDecodeError")
+
+
+def test_file_missing_a_required_intent_is_rejected(config_path):
+    watcher = IntentConfigWatcher(str(config_path), poll_interval=0)
+    active = watcher.current
+    edit(config_path, lambda tables: tables["intent_responses"].pop("greeting"))
+    assert not watcher.reload()
+    assert watcher.current is active
+    assert "greeting" in watcher.last_error
+
+    # Reverting the edit clears the error without rebuilding the snapshot
+    config_path.write_text(open(DEFAULT_INTENT_CONFIG, encoding="utf-8").read(), encoding="utf-8")
+    assert not watcher.reload()
+    assert watcher.current is active
+    assert watcher.last_error is None
+
+
+def test_bad_file_at_startup_raises(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        IntentConfigWatcher(str(path), poll_interval=0)
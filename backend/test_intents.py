@@ -0,0 +1,28 @@
+from benchmark import legacy_recognize_intent, synthetic_queries
+from intent_config import load_snapshot
+from intents import IntentMatcher
+
+
+def test_matcher_prefers_the_higher_priority_intent_anywhere_in_the_query():
+    matcher = IntentMatcher({"workout": ["leg day"], "greeting": ["hello"]}, ["workout", "greeting"])
+    assert matcher.match("hello, is today leg day?") == "workout"
+    assert matcher.match("Hello there") == "greeting"
+    assert matcher.match("reading books") == "default"
+
+
+def test_matcher_respects_word_boundaries():
+    matcher = IntentMatcher({"greeting": ["hi"]}, ["greeting"])
+    assert matcher.match("hi there") == "greeting"
+    assert matcher.match("this is a chip") == "default"
+
+
+def test_matcher_agrees_with_the_legacy_keyword_loop():
+    snapshot = load_snapshot()
+    queries = synthetic_queries(snapshot.keywords, 3000) + [
+        "Hello there, how are you?",
+        "What's a good diet to follow for weight loss?",
+        "My skin has been acting up, any tips on moisturizers?",
+        "I'm looking to improve my overall health and wellness.",
+        "I love reading books.",
+    ]
+    assert snapshot.matcher.match_many(queries) == [legacy_recognize_intent(query, snapshot) for query in queries]
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from llm_gate import LLMGate
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _admission_order(gate, tenants):
+    # Queue one call per entry in tenants behind a held slot and return the order they get in
+    order = []
+
+    async def call(tenant):
+        async with gate.slot(tenant):
+            order.append(tenant)
+
+    async with gate.slot("holder"):
+        tasks = []
+        for tenant in tenants:
+            tasks.append(asyncio.create_task(call(tenant)))
+            await asyncio.sleep(0)
+        assert gate.waiting == len(tenants)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_gate_interleaves_tenants_instead_of_serving_a_backlog_first():
+    gate = LLMGate(1)
+    order = run(_admission_order(gate, ["a", "a", "a", "b"]))
+    assert order == ["a", "b", "a", "a"]
+    assert gate.in_flight == 0
+
+
+def test_gate_weights_give_a_tenant_a_larger_share():
+    gate = LLMGate(1, weights={"a": 2})
+    order = run(_admission_order(gate, ["a", "a", "a", "a", "b", "b"]))
+    assert order[:4].count("a") == 3
+    assert gate.in_flight == 0
+
+
+def test_gate_skips_a_waiter_cancelled_in_the_queue():
+    async def scenario():
+        gate = LLMGate(1)
+        admitted = []
+
+        async def call(tenant):
+            async with gate.slot(tenant):
+                admitted.append(tenant)
+
+        async with gate.slot("holder"):
+            first = asyncio.create_task(call("first"))
+            second = asyncio.create_task(call("second"))
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0)
+        await second
+        assert first.cancelled()
+        return gate, admitted
+
+    gate, admitted = run(scenario())
+    assert admitted == ["second"]
+    assert gate.in_flight == 0
+    assert gate.waiting == 0
+
+
+def test_gate_passes_on_a_slot_handed_to_a_waiter_that_was_then_cancelled():
+    async def scenario():
+        gate = LLMGate(1)
+        admitted = []
+
+        async def call(tenant):
+            async with gate.slot(tenant):
+                admitted.append(tenant)
+
+        holder = gate.slot("holder")
+        await holder.__aenter__()
+        first = asyncio.create_task(call("first"))
+        second = asyncio.create_task(call("second"))
+        await asyncio.sleep(0)
+        # Hands the slot to "first", which is cancelled before it gets to run
+        await holder.__aexit__(None, None, None)
+        first.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        return gate, admitted
+
+    gate, admitted = run(scenario())
+    assert admitted == ["second"]
+    assert gate.in_flight == 0
+
+
+def test_gate_slot_timeout_leaves_the_queue():
+    async def scenario():
+        gate = LLMGate(1)
+        async with gate.slot("holder"):
+            with pytest.raises(asyncio.TimeoutError):
+                async with gate.slot("late", timeout=0.02):
+                    pass
+            assert gate.waiting == 0
+        return gate
+
+    assert run(scenario()).in_flight == 0
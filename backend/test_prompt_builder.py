@@ -0,0 +1,74 @@
+import asyncio
+
+from prompt_builder import PromptBuilder
+from sessions import SessionStore, SQLiteSessionTier
+
+
+def test_oldest_history_lines_are_dropped_to_fit_the_budget():
+    builder = PromptBuilder(token_budget=40)
+    history = [f"User: question number {i} about leg day" for i in range(10)]
+    messages, info = builder.build("You are a coach.", "and arms?", history)
+    kept = history[-info["history_lines"]:]
+    assert 0 < info["history_lines"] < len(history)
+    assert messages[1][1].endswith("\n".join(kept))
+    assert history[0] not in messages[1][1]
+    assert info["dropped_lines"] == len(history) - len(kept)
+    assert info["prompt_tokens"] <= 40
+
+
+async def _summarize(store, builder, session_id):
+    builder.maybe_summarize(store.get(session_id), "user@example.com")
+    await asyncio.gather(*builder._tasks)
+
+
+def test_old_turns_are_folded_into_a_persisted_summary(tmp_path):
+    calls = []
+
+    async def summarizer(summary, lines, tenant):
+        calls.append((summary, lines, tenant))
+        return "wants to train legs"
+
+    persist = SQLiteSessionTier(str(tmp_path / "sessions.db"))
+    store = SessionStore(persist=persist)
+    builder = PromptBuilder(token_budget=1024, summarize_after=3, keep_recent=1, summarizer=summarizer)
+    session_id = store.create()
+    for query in ["one", "two", "three", "four"]:
+        store.append(session_id, query)
+
+    asyncio.run(_summarize(store, builder, session_id))
+    assert calls == [("", ["User: one", "User: two", "User: three"], "user@example.com")]
+    assert store.get(session_id).snapshot()[1] == "wants to train legs"
+    assert store.get(session_id).queries() == ["four"]
+    # Another worker (or a restart) loads the summary and only the turns after it
+    reloaded = SessionStore(persist=persist).get(session_id)
+    assert reloaded.summary == "wants to train legs"
+    assert reloaded.queries() == ["four"]
+
+
+def test_short_sessions_are_not_summarized():
+    async def summarizer(summary, lines, tenant):
+        raise AssertionError("should not be called")
+
+    store = SessionStore()
+    builder = PromptBuilder(token_budget=1024, summarize_after=3, keep_recent=1, summarizer=summarizer)
+    session_id = store.create()
+    for query in ["one", "two", "three"]:
+        store.append(session_id, query)
+    asyncio.run(_summarize(store, builder, session_id))
+    assert builder.summaries == 0
+
+
+def test_failed_summary_keeps_the_turns():
+    async def summarizer(summary, lines, tenant):
+        raise RuntimeError("model unavailable")
+
+    store = SessionStore()
+    builder = PromptBuilder(token_budget=1024, summarize_after=2, keep_recent=1, summarizer=summarizer)
+    session_id = store.create()
+    for query in ["one", "two", "three"]:
+        store.append(session_id, query)
+    asyncio.run(_summarize(store, builder, session_id))
+    session = store.get(session_id)
+    assert session.queries() == ["one", "two", "three"]
+    assert builder.summary_failures == 1
+    assert not session.summarizing
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from rate_limit import MemoryBuckets, RateLimited, RateLimiter, refill, take
+from shared_state import SharedTokenBuckets
+
+
+def test_take_admits_while_tokens_last_and_reports_the_wait_otherwise():
+    assert take(2.0, 1, 0.5) == (1.0, 0.0)
+    assert take(0.5, 1, 0.5) == (0.5, 1.0)
+    assert take(0.0, 1, 0.0) == (0.0, float("inf"))
+
+
+def test_refill_is_capped_at_the_burst():
+    assert refill(0.0, 100.0, 102.0, 5, 1.0) == 2.0
+    assert refill(4.0, 100.0, 200.0, 5, 1.0) == 5
+
+
+def test_limiter_allows_the_burst_then_raises_with_retry_after():
+    limiter = RateLimiter(burst=2, refill_per_second=0.5)
+    limiter.acquire("a@example.com")
+    limiter.acquire("a@example.com")
+    with pytest.raises(RateLimited) as raised:
+        limiter.acquire("a@example.com")
+    assert 0 < raised.value.retry_after <= 2.0
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["limited"] == 1
+
+
+def test_tenants_have_separate_buckets():
+    limiter = RateLimiter(burst=1, refill_per_second=0.01)
+    limiter.acquire("a@example.com")
+    limiter.acquire("b@example.com")
+    with pytest.raises(RateLimited):
+        limiter.acquire("a@example.com")
+
+
+def test_bucket_refills_over_time():
+    limiter = RateLimiter(burst=1, refill_per_second=50)
+    limiter.acquire("a@example.com")
+    with pytest.raises(RateLimited):
+        limiter.acquire("a@example.com")
+    time.sleep(0.03)
+    limiter.acquire("a@example.com")
+
+
+def test_zero_burst_disables_the_limiter():
+    limiter = RateLimiter(burst=0, refill_per_second=1)
+    for _ in range(100):
+        limiter.acquire("a@example.com")
+    assert limiter.stats()["limited"] == 0
+
+
+def test_memory_buckets_drop_the_least_recently_used_tenant():
+    buckets = MemoryBuckets(max_tenants=2)
+    for tenant in ["a", "b", "c"]:
+        buckets.take(tenant, 1, 1, 0.01)
+    assert len(buckets) == 2
+    # "a" was dropped, so it starts again from a full bucket
+    assert buckets.take("a", 1, 1, 0.01) == 0.0
+    assert buckets.take("c", 1, 1, 0.01) > 0
+
+
+def test_shared_buckets_hold_one_limit_across_workers(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    worker_a = RateLimiter(burst=2, refill_per_second=0.01, buckets=SharedTokenBuckets(path))
+    worker_b = RateLimiter(burst=2, refill_per_second=0.01, buckets=SharedTokenBuckets(path))
+    assert worker_a.blocking
+    worker_a.acquire("a@example.com")
+    worker_b.acquire("a@example.com")
+    with pytest.raises(RateLimited):
+        worker_a.acquire("a@example.com")
+    with pytest.raises(RateLimited):
+        worker_b.acquire("a@example.com")
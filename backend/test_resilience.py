@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, bounded_stream, hedged
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+# hedged
+
+def test_hedged_returns_without_hedging_when_the_call_is_fast():
+    async def call():
+        return "answer"
+
+    assert run(hedged(call, 0.5, 1.0)) == ("answer", False)
+
+
+def test_hedged_fires_a_second_copy_after_the_delay_and_cancels_the_loser():
+    started = []
+    cancelled = []
+
+    async def call():
+        attempt = len(started)
+        started.append(attempt)
+        try:
+            await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    assert run(hedged(call, 0.05, 2.0)) == (1, True)
+    assert started == [0, 1]
+    assert cancelled == [0]
+
+
+def test_hedged_failure_falls_through_to_the_other_copy():
+    started = []
+
+    async def call():
+        attempt = len(started)
+        started.append(attempt)
+        if attempt == 0:
+            await asyncio.sleep(0.1)
+            raise RuntimeError("upstream error")
+        await asyncio.sleep(0.2)
+        return "hedge"
+
+    assert run(hedged(call, 0.02, 2.0)) == ("hedge", True)
+
+
+def test_hedged_raises_the_last_error_when_every_copy_fails():
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        run(hedged(call, 0.001, 1.0))
+
+
+def test_hedged_times_out():
+    async def call():
+        await asyncio.sleep(1.0)
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        run(hedged(call, None, 0.05))
+    assert time.monotonic() - start < 0.5
+
+
+# bounded_stream
+
+def test_bounded_stream_times_out_and_closes_the_stream():
+    closed = []
+
+    async def stream():
+        try:
+            yield "first"
+            await asyncio.sleep(1.0)
+            yield "second"
+        finally:
+            closed.append(True)
+
+    async def consume():
+        chunks = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for chunk in bounded_stream(stream(), 0.05):
+                chunks.append(chunk)
+        return chunks
+
+    assert run(consume()) == ["first"]
+    assert closed == [True]
+
+
+# CircuitBreaker
+
+def test_breaker_opens_at_the_failure_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.available()
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_breaker_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.available()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=0.01)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_breaker_cancelled_probe_lets_the_next_request_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.available()
+    assert breaker.allow()
@@ -0,0 +1,62 @@
+import time
+
+from response_cache import MemoryTier, ResponseCache, SQLiteTier, cache_key
+
+
+def messages(query: str):
+    return [("system", "You are a certified fitness coach."), ("human", "Current Question: " + query)]
+
+
+def test_key_ignores_case_and_whitespace():
+    assert cache_key(messages("Leg  day plan")) == cache_key(messages("leg day plan"))
+    assert cache_key(messages("leg day plan")) != cache_key(messages("arm day plan"))
+
+
+def test_memory_tier_expires_entries_after_the_ttl():
+    tier = MemoryTier(max_entries=10, ttl=0.02)
+    tier.set("key", "answer")
+    assert tier.get("key") == "answer"
+    time.sleep(0.03)
+    assert tier.get("key") is None
+    assert len(tier) == 0
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    tier = MemoryTier(max_entries=2, ttl=60)
+    tier.set("a", 1)
+    tier.set("b", 2)
+    tier.get("a")
+    tier.set("c", 3)
+    assert tier.get("b") is None
+    assert tier.get("a") == 1
+    assert tier.get("c") == 3
+
+
+def test_sqlite_tier_expires_entries_after_the_ttl(tmp_path):
+    tier = SQLiteTier(str(tmp_path / "responses.db"), ttl=0.02)
+    tier.set("key", "answer")
+    assert tier.get("key") == "answer"
+    time.sleep(0.03)
+    assert tier.get("key") is None
+    assert len(tier) == 0
+
+
+def test_hit_in_a_slower_tier_is_promoted_to_the_faster_ones(tmp_path):
+    memory = MemoryTier(max_entries=10, ttl=60)
+    disk = SQLiteTier(str(tmp_path / "responses.db"), ttl=60)
+    disk.set(cache_key(messages("leg day plan")), "squats")
+    cache = ResponseCache([memory, disk])
+
+    assert cache.get(messages("leg day plan")) == "squats"
+    assert memory.get(cache_key(messages("leg day plan"))) == "squats"
+    assert cache.get(messages("arm day plan")) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_set_writes_every_tier(tmp_path):
+    memory = MemoryTier(max_entries=10, ttl=60)
+    disk = SQLiteTier(str(tmp_path / "responses.db"), ttl=60)
+    ResponseCache([memory, disk]).set(messages("leg day plan"), "squats")
+    # A restarted worker with an empty memory tier still finds the answer on disk
+    assert ResponseCache([MemoryTier(max_entries=10, ttl=60), disk]).get(messages("leg day plan")) == "squats"
@@ -0,0 +1,48 @@
+import time
+
+from sessions import SessionStore, SQLiteSessionTier
+
+
+def test_session_keeps_only_the_newest_turns():
+    store = SessionStore(max_turns=3)
+    session_id = store.create()
+    for query in ["one", "two", "three", "four"]:
+        store.append(session_id, query)
+    assert store.get(session_id).queries() == ["two", "three", "four"]
+
+
+def test_least_recently_used_session_is_evicted_over_capacity():
+    store = SessionStore(max_sessions=2)
+    first, second = store.create(), store.create()
+    store.get(first)
+    store.create()
+    assert store.cached(first) is not None
+    assert store.cached(second) is None
+    assert store.evicted == 1
+
+
+def test_idle_sessions_are_evicted():
+    store = SessionStore(idle_ttl=0.02)
+    idle = store.create()
+    time.sleep(0.03)
+    store.create()
+    assert store.cached(idle) is None
+
+
+def test_evicted_session_is_reloaded_from_the_persist_tier(tmp_path):
+    store = SessionStore(max_sessions=1, persist=SQLiteSessionTier(str(tmp_path / "sessions.db")))
+    session_id = store.create()
+    store.append(session_id, "leg day plan")
+    store.create()
+    assert store.cached(session_id) is None
+    assert store.get(session_id).queries() == ["leg day plan"]
+
+
+def test_shared_stores_see_each_others_turns(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SessionStore(persist=SQLiteSessionTier(path), shared=True)
+    worker_b = SessionStore(persist=SQLiteSessionTier(path), shared=True)
+    session_id = worker_a.create()
+    worker_a.append(session_id, "leg day plan")
+    worker_b.append(session_id, "and for arms?")
+    assert worker_a.get(session_id).queries() == ["leg day plan", "and for arms?"]
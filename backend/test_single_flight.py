@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_one_key_share_a_single_upstream_call():
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("key", upstream) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.deduplicated == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def scenario():
+        flight = SingleFlight()
+        await asyncio.gather(flight.run("a", upstream), flight.run("b", upstream))
+        await flight.run("a", upstream)
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+
+
+def test_error_reaches_every_waiter():
+    async def upstream():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream error")
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.run("key", upstream) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+def test_one_waiter_cancelling_does_not_cancel_the_shared_call():
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def scenario():
+        flight = SingleFlight()
+        leaving = asyncio.create_task(flight.run("key", upstream))
+        staying = asyncio.create_task(flight.run("key", upstream))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario()) == "answer"
@@ -1,9 +1,15 @@
 import streamlit as st
 import requests
+import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # FastAPI server URL
 API_URL = "http://127.0.0.1:8000"
 
+# Number of chat turns rendered at once; older ones load on demand
+HISTORY_PAGE_SIZE = 10
+
 # Streamlit App
 st.set_page_config(layout="wide", page_title="FitAura Bot")
 
@@ -12,6 +18,34 @@ if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []  # Store previous prompts and responses
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = None  # Backend conversation session, created at login
+if 'pending' not in st.session_state:
+    st.session_state.pending = []  # Replies still being fetched in the background
+if 'visible_turns' not in st.session_state:
+    st.session_state.visible_turns = HISTORY_PAGE_SIZE  # How many of the newest turns to render
+
+@st.cache_resource
+def get_http():
+    # One keep-alive connection pool shared by every rerun and browser session
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    return http
+
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="fitaura-reply")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_welcome():
+    # Landing-page message; cached so reruns do not hit the backend again.
+    # Failures raise instead of returning None: st.cache_data does not cache exceptions,
+    # so the next rerun retries rather than showing the error until the TTL runs out
+    response = get_http().get(f"{API_URL}/", timeout=5)
+    response.raise_for_status()
+    return response.json()["message"]
 
 # Disable fields based on login status
 disable_fields = st.session_state.logged_in
@@ -23,13 +57,98 @@ def reset_fields():
     st.session_state.gender = "Select"
     st.session_state.age = 1
     st.session_state.chat_history = []  # Clear chat history on logout
+    st.session_state.session_id = None
+    st.session_state.pending = []
+    st.session_state.visible_turns = HISTORY_PAGE_SIZE
 
 def login_action():
     st.session_state.logged_in = True
+    # The backend keeps the conversation history for this session
+    st.session_state.session_id = get_http().post(f"{API_URL}/sessions", timeout=10).json()["session_id"]
 
 def logout_action():
     reset_fields()
 
+def show_older_action():
+    st.session_state.visible_turns += HISTORY_PAGE_SIZE
+
+class PendingReply:
+    # Filled in by a worker thread; the UI only reads it
+    def __init__(self):
+        self.chunks = []
+        self.intent_response = ""
+        self.error = None
+        self.done = False
+
+    def text(self):
+        return "".join(self.chunks)
+
+def fetch_reply(http, payload, reply):
+    # Runs off the Streamlit script thread, so it gets the session passed in rather than calling
+    # get_http() (a cached resource needs the script's context): consume the NDJSON stream into the PendingReply
+    try:
+        with http.post(f"{API_URL}/send_message/stream", json=payload, stream=True, timeout=(5, 120)) as response:
+            if response.status_code == 429:
+                reply.error = f"You're sending messages too quickly. Please try again in {response.headers.get('Retry-After', 'a few')} seconds."
+                return
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if frame["type"] == "meta":
+                    reply.intent_response = frame.get("intent_response", "")
+                elif frame["type"] == "token":
+                    reply.chunks.append(frame["text"])
+                elif frame["type"] == "error":
+                    reply.error = frame["detail"]
+    except requests.RequestException as e:
+        reply.error = str(e)
+    finally:
+        reply.done = True
+
+def start_reply(input_query, label, keep_intent_response=False):
+    payload = {
+        "query": input_query,
+        "name": st.session_state.name,
+        "email": st.session_state.email,
+        "age": st.session_state.age,
+        "gender": st.session_state.gender,
+        "session_id": st.session_state.session_id
+    }
+    reply = PendingReply()
+    get_executor().submit(fetch_reply, get_http(), payload, reply)
+    st.session_state.pending.append({"label": label, "reply": reply, "keep_intent_response": keep_intent_response})
+
+@st.fragment(run_every=0.5)
+def render_pending():
+    # Show in-flight replies as they stream in; once all are done, move them into the chat history
+    for item in reversed(st.session_state.pending):
+        reply = item["reply"]
+        with st.chat_message("user"):
+            st.write(item["label"])
+        with st.chat_message("assistant"):
+            st.write(reply.text() + ("" if reply.done else " ▌") if reply.chunks else "Thinking…")
+            if reply.error:
+                st.error(reply.error)
+
+    if all(item["reply"].done for item in st.session_state.pending):
+        for item in st.session_state.pending:
+            reply = item["reply"]
+            # Keep the error in the history: the st.error above disappears with the rerun below
+            if not reply.chunks:
+                response = reply.error or "Sorry, something went wrong. Please try again."
+            elif reply.error:
+                response = f"{reply.text()}\n\n_(The answer was cut short: {reply.error})_"
+            else:
+                response = reply.text()
+            chat = {"query": item["label"], "response": response}
+            if item["keep_intent_response"] and reply.intent_response:
+                chat["intent_response"] = reply.intent_response
+            st.session_state.chat_history.append(chat)
+        st.session_state.pending = []
+        st.rerun()
+
 # Left Sidebar for User Input
 with st.sidebar:
     st.image("utils/logo.png", use_container_width=True)  # Add your bot's logo image
@@ -60,9 +179,17 @@ with col2:
             user_query = st.text_area("Type your question here...", height=100)
             submit_button = st.button("Submit")
 
-        # Chat history container (newest at the top)
+        # Replies still in flight sit above the history and refresh on their own
+        if st.session_state.pending:
+            render_pending()
+
+        # Chat history container (newest at the top). Only the newest visible_turns are rendered,
+        # so reruns cost the same however long the conversation gets.
         with st.container():
-            for index, chat in enumerate(reversed(st.session_state.chat_history)):  # Reverse order
+            chat_history = st.session_state.chat_history
+            oldest_visible = max(0, len(chat_history) - st.session_state.visible_turns)
+            for index in range(len(chat_history) - 1, oldest_visible - 1, -1):  # Reverse order
+                chat = chat_history[index]  # index is the turn's position, so widget keys stay stable as turns are added
                 with st.chat_message("user"):
                     st.write(chat["query"])
                 with st.chat_message("assistant"):
@@ -72,12 +199,6 @@ with col2:
                     with st.chat_message("assistant"):
                         st.write(chat["intent_response"])
 
-
-                history_limit = 5  # Change this number to control history depth
-                conversation_history = "\n".join(
-                    [f"User: {chat['query']}" for chat in st.session_state.chat_history[-history_limit:]]
-                )
-
                 # Show "Yes" button if an intent_response exists
                 if "intent_response" in chat and chat["intent_response"]:
                     if chat["intent_response"] == "common":
@@ -88,102 +209,47 @@ with col2:
                         with col1:
                             if st.button("Excerise", key=f"fitness_button_{index}"):
                                 input_query = f"My question: {chat['query']}. User clarified: Fitness."
-                                response = requests.post(f"{API_URL}/send_message", json={
-                                    "query": input_query,
-                                    "name": st.session_state.name,
-                                    "email": st.session_state.email,
-                                    "age": st.session_state.age,
-                                    "gender": st.session_state.gender,
-                                    "query_history": conversation_history
-                                })
-                                bot_response = response.json()["response"]
-                                st.session_state.chat_history.append({"query": "Exercise - "+chat["query"], "response": bot_response})
+                                start_reply(input_query, "Exercise - "+chat["query"])
                                 st.rerun()
 
                         with col2:
                             if st.button("Skincare", key=f"skincare_button_{index}"):
                                 input_query = f"My question: {chat['query']}. User clarified: Skincare."
-                                response = requests.post(f"{API_URL}/send_message", json={
-                                    "query": input_query,
-                                    "name": st.session_state.name,
-                                    "email": st.session_state.email,
-                                    "age": st.session_state.age,
-                                    "gender": st.session_state.gender,
-                                    "query_history": conversation_history
-                                })
-                                bot_response = response.json()["response"]
-                                st.session_state.chat_history.append({"query": "Skincare - "+chat["query"], "response": bot_response})
+                                start_reply(input_query, "Skincare - "+chat["query"])
                                 st.rerun()
 
                         with col3:
                             if st.button("Nutrition", key=f"nutrition_button_{index}"):
                                 input_query = f"My question: {chat['query']}. User clarified: Nutrition."
-                                response = requests.post(f"{API_URL}/send_message", json={
-                                    "query": input_query,
-                                    "name": st.session_state.name,
-                                    "email": st.session_state.email,
-                                    "age": st.session_state.age,
-                                    "gender": st.session_state.gender,
-                                    "query_history": conversation_history
-                                })
-                                bot_response = response.json()["response"]
-                                st.session_state.chat_history.append({"query": "Nutrition - "+chat["query"], "response": bot_response})
+                                start_reply(input_query, "Nutrition - "+chat["query"])
                                 st.rerun()
                     
                     else:
                         if st.button("Yes", key=f"yes_button_{index}"):
                             input_query = f"My question: {chat['intent_response']} User responded Yes. So provide information."
-                            response = requests.post(f"{API_URL}/send_message", json={
-                                "query": input_query,
-                                "name": st.session_state.name,
-                                "email": st.session_state.email,
-                                "age": st.session_state.age,
-                                "gender": st.session_state.gender,
-                                "query_history": conversation_history
-                            })
-                            print(response.json())
-                            bot_response = response.json()["response"]
-                            st.session_state.chat_history.append({"query": chat["intent_response"] + " Yes!", "response": bot_response})
+                            start_reply(input_query, chat["intent_response"] + " Yes!")
                             st.rerun()
 
+            if oldest_visible > 0:
+                st.button(f"Show older messages ({oldest_visible} more)", on_click=show_older_action)
+
 
         # Process user input after rendering UI
         if submit_button and user_query.strip():
-
-            history_limit = 5  # Change this number to control history depth
-            conversation_history = "\n".join(
-                [f"User: {chat['query']}" for chat in st.session_state.chat_history[-history_limit:]]
-            )
-
-        
-            # Call FastAPI endpoint
-            response = requests.post(f"{API_URL}/send_message", json={
-                "query": user_query,
-                "name": st.session_state.name,
-                "email": st.session_state.email,
-                "age": st.session_state.age,
-                "gender": st.session_state.gender,
-                "query_history": conversation_history
-            })
-
-            # Extract response
-            bot_response = response.json()["response"]
-            intent_response = response.json().get("intent_response", "")
-
-            # Store query and response in session state
-            if intent_response:
-                st.session_state.chat_history.append({"query": user_query, "response": bot_response, "intent_response": intent_response})
-            else:
-                st.session_state.chat_history.append({"query": user_query, "response": bot_response})
+            # Call FastAPI endpoint in the background; the reply streams into the pending area
+            start_reply(user_query, user_query, keep_intent_response=True)
 
             # Rerun script to update UI
             st.rerun()
 
     else:
         # Default content when logged out
-        response = requests.get(f"{API_URL}/")
-        if response.status_code == 200:
-            st.title(response.json()["message"])
+        try:
+            welcome_message = fetch_welcome()
+        except requests.RequestException:
+            welcome_message = None
+        if welcome_message:
+            st.title(welcome_message)
             st.write(
                 "### Your AI companion for a balanced lifestyle!\n"
                 "**FitAura Bot** offers expert guidance in three key areas:\n"